@@ -2,78 +2,78 @@
 Analyze pose detection accuracy and provide recommendations.
 """
 
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.pose_detector import PoseDetector
-from src.video_processor import VideoProcessor
-import cv2
-import numpy as np
+from src.quality import QualityReport
 
 
-def analyze_detection_quality(video_path: str):
-    """Analyze detailed detection metrics for a video."""
+# Same layout as src/api.py, so reports on shared storage are found too
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", str(Path(__file__).parent)))
+OUTPUT_DIR = STORAGE_DIR / "outputs"
+
+
+def resolve_report_path(target: str) -> Path:
+    """Accept a quality report path or an API video_id."""
+    
+    path = Path(target)
+    if path.suffix == ".json":
+        return path
     
-    detector = PoseDetector(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    cap = cv2.VideoCapture(video_path)
+    # Anything else is treated as a video_id from /api/analyze
+    return OUTPUT_DIR / f"{target}_quality.json"
+
+
+def analyze_detection_quality(report_path: str):
+    """Print detection metrics stored by a previous processing run.
     
-    if not cap.isOpened():
-        print(f"❌ Cannot open video: {video_path}")
+    Metrics are collected by VideoProcessor.process_video while it renders
+    the skeleton, so no second inference pass over the video is needed.
+    """
+    
+    if not Path(report_path).exists():
+        print(f"❌ No quality report found: {report_path}")
+        print("   Process the video first (POST /api/analyze or")
+        print("   python process_video.py in.mp4 out.mp4 --quality-report report.json)")
         return
     
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    report = QualityReport.load(report_path)
+    
+    frames_processed = report["frames_processed"]
+    frames_detected = report["frames_detected"]
+    detection_rate = report["detection_rate"]
+    avg_confidence = report["average_confidence"]
+    avg_keypoints = report["average_visible_keypoints"]
+    total_keypoints = report["total_keypoints"]
     
     print(f"\n{'='*60}")
-    print(f"ANALYZING: {Path(video_path).name}")
+    print(f"ANALYZING: {Path(report_path).name}")
     print(f"{'='*60}")
-    print(f"Resolution: {width}x{height}")
-    print(f"FPS: {fps}")
-    print(f"Total Frames: {total_frames}")
-    print(f"Duration: {total_frames/fps:.2f} seconds\n")
-    
-    frames_detected = 0
-    confidence_scores = []
-    keypoint_counts = []
-    
-    frame_num = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        landmarks = detector.detect_pose(frame)
-        
-        if landmarks:
-            frames_detected += 1
-            
-            # Calculate average confidence across all landmarks
-            confidences = [lm.visibility for lm in landmarks.landmark]
-            avg_confidence = np.mean(confidences)
-            confidence_scores.append(avg_confidence)
-            
-            # Count visible keypoints (visibility > 0.5)
-            visible_keypoints = sum(1 for c in confidences if c > 0.5)
-            keypoint_counts.append(visible_keypoints)
-        
-        frame_num += 1
-    
-    cap.release()
-    detector.cleanup()
-    
-    # Calculate metrics
-    detection_rate = (frames_detected / total_frames * 100) if total_frames > 0 else 0
-    avg_confidence = np.mean(confidence_scores) if confidence_scores else 0
-    avg_keypoints = np.mean(keypoint_counts) if keypoint_counts else 0
+    print(f"Processed Frames: {frames_processed}\n")
     
     print(f"📊 DETECTION METRICS:")
-    print(f"├─ Detection Rate: {detection_rate:.1f}% ({frames_detected}/{total_frames} frames)")
+    print(f"├─ Detection Rate: {detection_rate:.1f}% ({frames_detected}/{frames_processed} frames)")
     print(f"├─ Average Confidence: {avg_confidence:.3f}")
-    print(f"├─ Average Visible Keypoints: {avg_keypoints:.1f}/33")
-    print(f"└─ Min Keypoints: {min(keypoint_counts) if keypoint_counts else 0}")
+    print(f"├─ Average Visible Keypoints: {avg_keypoints:.1f}/{total_keypoints}")
+    print(f"├─ Min Keypoints: {report['min_visible_keypoints']}")
+    print(f"└─ Dropout Segments: {len(report['dropout_segments'])}")
+    
+    for segment in report["dropout_segments"][:5]:
+        print(f"   • frames {segment['start_frame']}-{segment['end_frame']}")
+    
+    # Landmarks that spend most detected frames below the visibility threshold
+    num_bins = len(report["landmark_visibility"]["bin_edges"]) - 1
+    threshold_bin = int(report["visibility_threshold"] * num_bins)
+    weak_landmarks = []
+    for name, histogram in report["landmark_visibility"]["histograms"].items():
+        low = sum(histogram[:threshold_bin])
+        if frames_detected and low / frames_detected > 0.5:
+            weak_landmarks.append(name)
+    
+    if weak_landmarks:
+        print(f"\n👁  Mostly occluded landmarks: {', '.join(weak_landmarks)}")
     
     # Accuracy assessment
     print(f"\n🎯 ACCURACY ASSESSMENT:")
@@ -150,6 +150,16 @@ def compare_model_settings():
     print("   → 10-15 FPS, ~97% detection rate")
     print("   → Good for: high-quality analysis, professional use\n")
     
+    print("⏱  ADAPTIVE (Deadline-aware):")
+    print("   target_fps / deadline_seconds on /api/analyze")
+    print("   → measures live FPS and switches between complexity 0/1/2")
+    print("   → job status records which complexity handled which frames\n")
+    
+    print("🔌 INFERENCE BACKENDS:")
+    print("   solutions (default), tasks (PoseLandmarker), onnx (ONNX Runtime)")
+    print("   → python benchmark_backends.py <video> --backend ... compares speed")
+    print("     and landmark agreement on your CPU\n")
+    
     print("✅ RECOMMENDATION FOR CALLUS:")
     print("   Current settings (complexity=1) are OPTIMAL for:")
     print("   ├─ Dance video processing")
@@ -162,20 +172,18 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1:
-        video_path = sys.argv[1]
-        analyze_detection_quality(video_path)
+        analyze_detection_quality(str(resolve_report_path(sys.argv[1])))
     else:
         # Analyze the most recent processed video
-        output_dir = Path(__file__).parent / "uploads"
-        videos = list(output_dir.glob("*.mp4"))
+        reports = list(OUTPUT_DIR.glob("*_quality.json"))
         
-        if videos:
-            latest_video = max(videos, key=lambda p: p.stat().st_mtime)
+        if reports:
+            latest_report = max(reports, key=lambda p: p.stat().st_mtime)
             print(f"📹 Analyzing most recent video...")
-            analyze_detection_quality(str(latest_video))
+            analyze_detection_quality(str(latest_report))
         else:
-            print("❌ No videos found in uploads/ directory")
-            print("\nUsage: python analyze_accuracy.py <video_path>")
+            print(f"❌ No quality reports found in {OUTPUT_DIR}")
+            print("\nUsage: python analyze_accuracy.py <video_id | quality_report.json>")
             print("   or: Upload a video via the API first\n")
         
         compare_model_settings()
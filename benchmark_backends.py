@@ -0,0 +1,217 @@
+"""
+Benchmark and compare pose inference backends on the same frames.
+
+Decodes a clip once into memory, runs each backend over it and reports
+throughput (inference only, decode excluded) plus agreement with a
+reference backend: detection agreement, mean landmark error and PCK.
+Backends are given as specs, e.g.
+
+    solutions
+    solutions:model_complexity=2
+    tasks:model_path=models/pose_landmarker_full.task
+    onnx:model_path=models/pose_landmark_full.onnx,batch_size=8,intra_op_threads=4
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import cv2
+import numpy as np
+
+from src.checkpoint import landmarks_to_array
+from src.pose_detector import PoseDetector
+
+
+def parse_backend_spec(spec: str) -> Tuple[str, dict, dict]:
+    """Split "name:key=value,..." into (name, detector kwargs, backend_options)."""
+
+    name, _, option_text = spec.partition(":")
+    detector_kwargs = {}
+    backend_options = {}
+
+    for item in filter(None, option_text.split(",")):
+        key, _, value = item.partition("=")
+        for cast in (int, float):
+            try:
+                value = cast(value)
+                break
+            except ValueError:
+                continue
+        if value in ("true", "false"):
+            value = value == "true"
+
+        # These are PoseDetector arguments; everything else is the backend's
+        if key in ("model_complexity", "min_detection_confidence", "min_tracking_confidence"):
+            detector_kwargs[key] = value
+        else:
+            backend_options[key] = value
+
+    return name, detector_kwargs, backend_options
+
+
+def load_frames(path: str, max_frames: int = 300, max_width: Optional[int] = None) -> Tuple[List[np.ndarray], float]:
+    """Decode up to max_frames RGB frames (optionally downscaled) and the fps."""
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if max_width and frame.shape[1] > max_width:
+            height = int(round(frame.shape[0] * max_width / frame.shape[1]))
+            frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    cap.release()
+    return frames, fps
+
+
+def run_backend(detector: PoseDetector, frames: List[np.ndarray], fps: float, warmup: int = 5) -> dict:
+    """Time detection over frames in batches of the backend's batch size."""
+
+    batch_size = detector.batch_size
+    timestamps = [i * 1000.0 / fps for i in range(len(frames))]
+
+    # Model loading and first-call allocations shouldn't count as throughput
+    if warmup:
+        detector.detect_batch(frames[:warmup], is_rgb=True, timestamps_ms=timestamps[:warmup])
+
+    results = []
+    started = time.perf_counter()
+    for first in range(0, len(frames), batch_size):
+        results.extend(detector.detect_batch(
+            frames[first:first + batch_size], is_rgb=True, timestamps_ms=timestamps[first:first + batch_size]
+        ))
+    seconds = time.perf_counter() - started
+
+    return {
+        "landmarks": np.stack([landmarks_to_array(r) for r in results]) if results else np.empty((0, 33, 4)),
+        "seconds": seconds,
+        "fps": len(frames) / seconds if seconds > 0 else 0.0
+    }
+
+
+def compare_landmarks(reference: np.ndarray,
+                      candidate: np.ndarray,
+                      visibility_threshold: float = 0.5,
+                      pck_threshold: float = 0.05) -> dict:
+    """Agreement of candidate landmarks with reference ones, both (frames, 33, 4).
+
+    Errors are Euclidean distances in normalized image coordinates, over
+    landmarks the reference sees (visibility above the threshold) in frames
+    where both found a pose. PCK is the fraction within pck_threshold.
+    """
+
+    ref_detected = ~np.isnan(reference).all(axis=(1, 2))
+    cand_detected = ~np.isnan(candidate).all(axis=(1, 2))
+    both = ref_detected & cand_detected
+
+    distances = np.linalg.norm(reference[both, :, :2] - candidate[both, :, :2], axis=2)
+    visible = reference[both, :, 3] > visibility_threshold
+    errors = distances[visible]
+
+    frames = len(reference)
+    return {
+        "detection_agreement": float(np.mean(ref_detected == cand_detected)) if frames else 0.0,
+        "frames_compared": int(both.sum()),
+        "mean_error": round(float(errors.mean()), 5) if errors.size else None,
+        "median_error": round(float(np.median(errors)), 5) if errors.size else None,
+        f"pck@{pck_threshold}": round(float(np.mean(errors < pck_threshold)), 4) if errors.size else None
+    }
+
+
+def benchmark(specs: List[str],
+              frames: List[np.ndarray],
+              fps: float,
+              reference: Optional[str] = None,
+              warmup: int = 5) -> dict:
+    """Run every backend spec over frames and compare each with the reference
+    spec (default: the first one)."""
+
+    reference = reference or specs[0]
+    if reference not in specs:
+        specs = [reference] + specs
+
+    runs = {}
+    for spec in specs:
+        name, detector_kwargs, backend_options = parse_backend_spec(spec)
+        detector = PoseDetector(backend=name, backend_options=backend_options, **detector_kwargs)
+        try:
+            runs[spec] = run_backend(detector, frames, fps, warmup=warmup)
+            runs[spec]["batch_size"] = detector.batch_size
+        finally:
+            detector.cleanup()
+
+    reference_landmarks = runs[reference]["landmarks"]
+    report = {
+        "frames": len(frames),
+        "resolution": f"{frames[0].shape[1]}x{frames[0].shape[0]}" if frames else None,
+        "reference": reference,
+        "backends": {}
+    }
+
+    for spec, run in runs.items():
+        detected = ~np.isnan(run["landmarks"]).all(axis=(1, 2))
+        entry = {
+            "fps": round(run["fps"], 2),
+            "ms_per_frame": round(1000 * run["seconds"] / len(frames), 2) if frames else None,
+            "batch_size": run["batch_size"],
+            "detection_rate": round(float(detected.mean()) * 100, 1) if frames else 0.0
+        }
+        if spec != reference:
+            entry["vs_reference"] = compare_landmarks(reference_landmarks, run["landmarks"])
+        report["backends"][spec] = entry
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark pose inference backends and compare their landmarks'
+    )
+    parser.add_argument('video', nargs='?', default=None,
+                        help='Clip to run on (default: a synthetic clip, speed only)')
+    parser.add_argument('--backend', action='append', dest='backends', default=None,
+                        help='Backend spec, repeatable (default: solutions)')
+    parser.add_argument('--reference', type=str, default=None,
+                        help='Spec whose landmarks count as ground truth (default: the first backend)')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to decode (default: 300)')
+    parser.add_argument('--max-width', type=int, default=None, help='Downscale frames to this width')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed warm-up frames per backend (default: 5)')
+    parser.add_argument('--output', type=str, default=None, help='Write the JSON report here as well')
+
+    args = parser.parse_args()
+    specs = args.backends or ['solutions']
+
+    if args.video:
+        frames, fps = load_frames(args.video, args.frames, args.max_width)
+    else:
+        from load_test import make_synthetic_video
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = make_synthetic_video(str(Path(tmpdir) / "synthetic.mp4"), seconds=args.frames / 30)
+            frames, fps = load_frames(path, args.frames, args.max_width)
+
+    if not frames:
+        print("Error: no frames could be decoded")
+        sys.exit(1)
+
+    report = benchmark(specs, frames, fps, reference=args.reference, warmup=args.warmup)
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
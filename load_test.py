@@ -0,0 +1,286 @@
+"""
+Load generator for the pose analysis API.
+
+Drives a mix of /api/analyze, /api/status, /api/download and /health
+requests at a target rate, either against a running server (--url) or
+in-process through an ASGI client, and reports throughput, latency
+percentiles and error rates as JSON. /health latency is a cheap probe for
+event-loop blocking: it should stay flat however busy processing gets.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import cv2
+import httpx
+import numpy as np
+
+
+DEFAULT_MIX = "analyze=1,status=4,download=2,health=3"
+
+
+def make_synthetic_video(path: str,
+                         seconds: float = 2.0,
+                         width: int = 640,
+                         height: int = 360,
+                         fps: int = 30,
+                         seed: int = 0) -> str:
+    """Write a deterministic test video: a bouncing block over seeded noise."""
+
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 64, size=(height, width, 3), dtype=np.uint8)
+    block = max(8, min(width, height) // 6)
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(path, fourcc, fps, (width, height))
+
+    for i in range(int(seconds * fps)):
+        frame = background.copy()
+        x = int((width - block) * (0.5 + 0.5 * np.sin(i / fps * 2.0)))
+        y = int((height - block) * (0.5 + 0.5 * np.cos(i / fps * 1.3)))
+        frame[y:y + block, x:x + block] = (200, 180, 160)
+        out.write(frame)
+
+    out.release()
+    return path
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("analyze", "status", "download", "health"):
+            raise ValueError(f"Unknown request type in mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def summarize(results: List[dict]) -> dict:
+    """Counts, error/rejection rates and latency percentiles for some results."""
+
+    latencies = np.array([r["latency"] for r in results]) * 1000
+    status_codes: Dict[str, int] = {}
+    for r in results:
+        key = str(r["status"]) if r["status"] is not None else "exception"
+        status_codes[key] = status_codes.get(key, 0) + 1
+
+    # 429/503 are deliberate backpressure, not failures
+    rejected = sum(1 for r in results if r["status"] in (429, 503))
+    errors = sum(1 for r in results if r["status"] is None or (r["status"] >= 500 and r["status"] != 503))
+    count = len(results)
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "rejected": rejected,
+        "error_rate": errors / count if count else 0.0,
+        "rejection_rate": rejected / count if count else 0.0,
+        "status_codes": status_codes,
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2),
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "max": round(float(latencies.max()), 2)
+        } if count else None
+    }
+
+
+async def send_request(client: httpx.AsyncClient,
+                       kind: str,
+                       videos: List[str],
+                       video_ids: List[str],
+                       client_id: str,
+                       rng: random.Random) -> dict:
+    """Issue one request of the given kind and time it."""
+
+    started = time.perf_counter()
+    status = None
+    error = None
+
+    try:
+        if kind == "analyze":
+            path = rng.choice(videos)
+            with open(path, "rb") as f:
+                response = await client.post(
+                    "/api/analyze",
+                    files={"video": (Path(path).name, f, "video/mp4")},
+                    headers={"X-Client-ID": client_id}
+                )
+            if response.status_code == 200:
+                video_ids.append(response.json()["video_id"])
+        elif kind == "status":
+            response = await client.get(f"/api/status/{rng.choice(video_ids)}")
+        elif kind == "download":
+            response = await client.get(f"/api/download/{rng.choice(video_ids)}")
+        else:
+            response = await client.get("/health")
+        status = response.status_code
+    except httpx.HTTPError as e:
+        error = str(e)
+
+    return {
+        "kind": kind,
+        "status": status,
+        "error": error,
+        "latency": time.perf_counter() - started
+    }
+
+
+async def run_load_test(client: httpx.AsyncClient,
+                        videos: List[str],
+                        duration: float = 30.0,
+                        rate: float = 2.0,
+                        mix: Optional[Dict[str, float]] = None,
+                        clients: int = 4,
+                        max_in_flight: int = 32,
+                        seed: int = 0,
+                        cleanup: bool = True) -> dict:
+    """Send requests at `rate` per second for `duration` seconds and report.
+
+    Arrivals are open-loop: new requests keep their schedule even when the
+    server is slow, so queueing shows up as latency. Requests that would
+    exceed max_in_flight are counted as dropped instead of sent. Jobs the
+    run created are deleted afterwards (untimed) unless cleanup is False.
+    """
+
+    mix = mix or parse_mix(DEFAULT_MIX)
+    kinds, weights = zip(*mix.items())
+    rng = random.Random(seed)
+    video_ids: List[str] = []
+    in_flight = asyncio.Semaphore(max_in_flight)
+    results: List[dict] = []
+    tasks = []
+    dropped = 0
+
+    async def tracked(kind: str, client_id: str, request_rng: random.Random):
+        try:
+            results.append(await send_request(client, kind, videos, video_ids, client_id, request_rng))
+        finally:
+            in_flight.release()
+
+    started = time.perf_counter()
+    total = int(duration * rate)
+
+    for i in range(total):
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        kind = rng.choices(kinds, weights)[0]
+        # status/download need a finished job; analyze until one exists
+        if kind in ("status", "download") and not video_ids:
+            kind = "analyze"
+
+        if in_flight.locked():
+            dropped += 1
+            continue
+        await in_flight.acquire()
+
+        client_id = f"load-test-{rng.randrange(clients)}"
+        tasks.append(asyncio.create_task(tracked(kind, client_id, random.Random(rng.random()))))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    if cleanup:
+        for video_id in video_ids:
+            await client.delete(f"/api/cleanup/{video_id}")
+
+    return {
+        "config": {
+            "duration_seconds": duration,
+            "target_rate": rate,
+            "mix": mix,
+            "clients": clients,
+            "max_in_flight": max_in_flight,
+            "seed": seed
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 3) if elapsed else 0.0,
+        "dropped": dropped,
+        "overall": summarize(results),
+        "endpoints": {
+            kind: summarize([r for r in results if r["kind"] == kind])
+            for kind in kinds if any(r["kind"] == kind for r in results)
+        }
+    }
+
+
+async def main_async(args) -> dict:
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        videos = [
+            make_synthetic_video(
+                str(Path(tmpdir) / f"synthetic_{i}.mp4"),
+                seconds=args.video_seconds, width=width, height=height, fps=args.fps, seed=args.seed + i
+            )
+            for i in range(args.videos)
+        ]
+
+        if args.url:
+            transport = httpx.AsyncHTTPTransport()
+            base_url = args.url
+        else:
+            from src.api import app
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://load-test"
+
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+            return await run_load_test(
+                client, videos,
+                duration=args.duration,
+                rate=args.rate,
+                mix=parse_mix(args.mix),
+                clients=args.clients,
+                max_in_flight=args.max_in_flight,
+                seed=args.seed,
+                cleanup=not args.keep_jobs
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load test the pose analysis API and report latency percentiles'
+    )
+    parser.add_argument('--url', type=str, default=None,
+                        help='Base URL of a running server (default: run the app in-process)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to generate load (default: 30)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Requests per second (default: 2)')
+    parser.add_argument('--mix', type=str, default=DEFAULT_MIX,
+                        help=f'Request type weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--videos', type=int, default=3, help='Number of synthetic videos (default: 3)')
+    parser.add_argument('--video-seconds', type=float, default=2.0, help='Length of each video (default: 2)')
+    parser.add_argument('--resolution', type=str, default='640x360', help='Video resolution (default: 640x360)')
+    parser.add_argument('--fps', type=int, default=30, help='Video frame rate (default: 30)')
+    parser.add_argument('--clients', type=int, default=4, help='Distinct X-Client-ID values; the server only keys on them '
+                             'with ADMISSION_CLIENT_ID_HEADER=X-Client-ID (default: 4)')
+    parser.add_argument('--max-in-flight', type=int, default=32,
+                        help='Concurrent request cap; extra arrivals are dropped (default: 32)')
+    parser.add_argument('--timeout', type=float, default=300.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for videos and request mix')
+    parser.add_argument('--keep-jobs', action='store_true', help="Don't delete jobs created by the run")
+    parser.add_argument('--output', type=str, default=None, help='Write the JSON report here as well')
+
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
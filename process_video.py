@@ -11,6 +11,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.video_processor import VideoProcessor
+from src.pose_detector import PoseDetector
+from src.pose_backends import POSE_BACKENDS, backend_options
+from src.quality import QualityReport
+from src.complexity import ComplexityController, check_backend
+from src.previews import PreviewBuilder
+from src.checkpoint import Checkpoint
 
 
 def main():
@@ -33,6 +39,100 @@ def main():
         default=0.5,
         help='Minimum detection confidence (0.0-1.0, default: 0.5)'
     )
+    parser.add_argument(
+        '--start',
+        type=float,
+        default=None,
+        help='Start of the span to process (seconds, or frames with --frames)'
+    )
+    parser.add_argument(
+        '--end',
+        type=float,
+        default=None,
+        help='End of the span to process (seconds, or frames with --frames)'
+    )
+    parser.add_argument(
+        '--frames',
+        action='store_true',
+        help='Interpret --start/--end as frame indices instead of seconds'
+    )
+    parser.add_argument(
+        '--step',
+        type=int,
+        default=1,
+        help='Process every Nth frame of the span (default: 1)'
+    )
+    parser.add_argument(
+        '--quality-report',
+        type=str,
+        default=None,
+        help='Write detection quality metrics to this JSON file'
+    )
+    parser.add_argument(
+        '--target-fps',
+        type=float,
+        default=None,
+        help='Switch model complexity to sustain this processing speed'
+    )
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        default=None,
+        help='Switch model complexity to finish within this many seconds'
+    )
+    parser.add_argument(
+        '--decoder',
+        choices=['opencv', 'pyav'],
+        default='opencv',
+        help='Decode backend (pyav uses multithreaded libav decoding)'
+    )
+    parser.add_argument(
+        '--max-width',
+        type=int,
+        default=None,
+        help='Downscale frames to this width while decoding (pyav only)'
+    )
+    parser.add_argument(
+        '--pose-backend',
+        choices=POSE_BACKENDS,
+        default='solutions',
+        help='Pose inference backend (tasks and onnx need --pose-model)'
+    )
+    parser.add_argument(
+        '--pose-model',
+        type=str,
+        default=None,
+        help='Model file for the tasks (.task) or onnx (.onnx) backend'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Frames per inference call for the onnx backend (default: 8)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=0,
+        help='ONNX Runtime intra-op threads, 0 for one per core (default: 0)'
+    )
+    parser.add_argument(
+        '--previews',
+        action='store_true',
+        help='Also write a thumbnail sprite sheet and a short preview clip next to the output'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        default=None,
+        help='Checkpoint directory; rerunning the same command resumes an interrupted run'
+    )
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=int,
+        default=300,
+        help='Processed frames between checkpoints (default: 300)'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -41,6 +141,14 @@ def main():
     
     args = parser.parse_args()
     
+    if args.pose_backend != 'solutions' and not args.pose_model:
+        parser.error(f"--pose-backend {args.pose_backend} needs --pose-model")
+    if args.target_fps is not None or args.deadline is not None:
+        try:
+            check_backend(args.pose_backend)
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Validate input file
     if not Path(args.input).exists():
         print(f"Error: Input file not found: {args.input}")
@@ -52,26 +160,74 @@ def main():
     
     # Initialize processor
     print(f"Initializing pose detector (confidence: {args.confidence})...")
-    processor = VideoProcessor()
+    decode_options = {'max_width': args.max_width} if args.decoder == 'pyav' else {}
+    detector = PoseDetector(
+        min_detection_confidence=args.confidence,
+        backend=args.pose_backend,
+        backend_options=backend_options(args.pose_backend, args.pose_model, args.batch_size, args.threads)
+    )
+    processor = VideoProcessor(detector, decode_backend=args.decoder, decode_options=decode_options)
+    
+    quality_report = QualityReport() if args.quality_report else None
+    
+    complexity_controller = None
+    if args.target_fps is not None or args.deadline is not None:
+        complexity_controller = ComplexityController(
+            target_fps=args.target_fps,
+            deadline_seconds=args.deadline,
+            min_detection_confidence=args.confidence
+        )
+    
+    preview_builder = None
+    if args.previews:
+        stem = output_path.with_suffix('')
+        preview_builder = PreviewBuilder(f"{stem}_sprite.jpg", f"{stem}_preview.mp4")
+    
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint, interval=args.checkpoint_interval)
+        if checkpoint.exists():
+            print(f"Found checkpoint in {args.checkpoint}, resuming if the options match")
     
     # Process video
     print(f"Processing video: {args.input}")
     success, message = processor.process_video(
         args.input,
         args.output,
-        show_progress=args.verbose
+        show_progress=args.verbose,
+        start=args.start,
+        end=args.end,
+        unit='frames' if args.frames else 'seconds',
+        frame_step=args.step,
+        quality_report=quality_report,
+        complexity_controller=complexity_controller,
+        preview_builder=preview_builder,
+        checkpoint=checkpoint
     )
     
     # Show results
     if success:
         print(f"\n✓ {message}")
         print(f"Output saved to: {args.output}")
+        if quality_report is not None:
+            quality_report.save(args.quality_report)
+            print(f"Quality report saved to: {args.quality_report}")
+        if preview_builder is not None:
+            print(f"Previews saved to: {preview_builder.sprite_path}, {preview_builder.clip_path}")
+        if complexity_controller is not None:
+            for segment in complexity_controller.segments:
+                print(f"  complexity {segment['model_complexity']}: frames "
+                      f"{segment['start_frame']}-{segment['end_frame']} ({segment['fps']} fps)")
     else:
         print(f"\n✗ Processing failed: {message}")
+        if checkpoint is not None and checkpoint.exists():
+            print(f"Progress kept in {args.checkpoint}; rerun the same command to resume")
         sys.exit(1)
     
     # Cleanup
     processor.cleanup()
+    if complexity_controller is not None:
+        complexity_controller.cleanup()
 
 
 if __name__ == "__main__":
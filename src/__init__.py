@@ -1,5 +1,6 @@
 """Initialize src package"""
 from .pose_detector import PoseDetector
 from .video_processor import VideoProcessor
+from .quality import QualityReport
 
-__all__ = ['PoseDetector', 'VideoProcessor']
+__all__ = ['PoseDetector', 'VideoProcessor', 'QualityReport']
@@ -0,0 +1,191 @@
+"""
+Admission control and scheduling for analysis jobs.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+LANES = ('short', 'long')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job can't be accepted right now.
+
+    status_code is 429 when the client is over its own limit and 503 when
+    the whole node is overloaded; retry_after is in whole seconds.
+    """
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Ticket:
+    """An admitted job, waiting or running."""
+
+    def __init__(self, client_id: str, frames: int, lane: str, seq: int):
+        self.client_id = client_id
+        self.frames = frames
+        self.lane = lane
+        self.seq = seq
+        self.started_at: Optional[float] = None
+        self.turn: Optional[asyncio.Future] = None
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (LANES.index(self.lane), self.seq) < (LANES.index(other.lane), other.seq)
+
+
+class AdmissionController:
+    """Bounds queueing delay by rejecting work the node can't finish in time.
+
+    In-flight work is estimated as queued/running frames times the measured
+    seconds per frame. A job is rejected with 503 when its estimated wait
+    exceeds max_wait_seconds, and with 429 when its client already has
+    per_client_limit jobs admitted. Admitted jobs run at most `workers` at a
+    time, clips of up to short_clip_frames frames ahead of longer ones.
+    """
+
+    def __init__(self,
+                 max_wait_seconds: float = 120.0,
+                 per_client_limit: int = 2,
+                 short_clip_frames: int = 900,
+                 workers: int = 1,
+                 initial_seconds_per_frame: float = 0.04,
+                 clock: Callable[[], float] = time.monotonic):
+
+        self.max_wait_seconds = max_wait_seconds
+        self.per_client_limit = per_client_limit
+        self.short_clip_frames = short_clip_frames
+        self.workers = workers
+        self.seconds_per_frame = initial_seconds_per_frame
+        self._clock = clock
+
+        self._seq = itertools.count()
+        self._waiting: List[Ticket] = []
+        self._running: List[Ticket] = []
+        self._admitted: Dict[str, List[Ticket]] = {}
+
+    def lane_for(self, frames: int) -> str:
+        return 'short' if frames <= self.short_clip_frames else 'long'
+
+    def _remaining_seconds(self, ticket: Ticket, now: float) -> float:
+        estimate = ticket.frames * self.seconds_per_frame
+        if ticket.started_at is not None:
+            estimate -= now - ticket.started_at
+        return max(estimate, 0.0)
+
+    def estimated_wait(self, lane: str = 'long') -> float:
+        """Seconds a new job in `lane` would wait before starting."""
+
+        now = self._clock()
+        ahead = [t for t in self._waiting if LANES.index(t.lane) <= LANES.index(lane)]
+        work = sum(self._remaining_seconds(t, now) for t in self._running + ahead)
+        return work / self.workers
+
+    def check(self, client_id: str):
+        """Cheap pre-check before an upload is stored. Raises AdmissionRejected."""
+
+        self._check_client(client_id)
+
+        # Even the shortest clip would have to wait behind all running work
+        wait = self.estimated_wait('short')
+        if wait > self.max_wait_seconds:
+            raise AdmissionRejected(503, self._retry_after(wait), "Server is at capacity")
+
+    def admit(self, client_id: str, frames: int) -> Ticket:
+        """Reserve a place for a job of `frames` frames. Raises AdmissionRejected."""
+
+        self._check_client(client_id)
+
+        lane = self.lane_for(frames)
+        wait = self.estimated_wait(lane)
+        if wait > self.max_wait_seconds:
+            raise AdmissionRejected(503, self._retry_after(wait), "Server is at capacity")
+
+        ticket = Ticket(client_id, frames, lane, next(self._seq))
+        self._admitted.setdefault(client_id, []).append(ticket)
+        return ticket
+
+    def _check_client(self, client_id: str):
+        tickets = self._admitted.get(client_id, [])
+        if len(tickets) < self.per_client_limit:
+            return
+
+        # Earliest point one of this client's jobs could finish
+        now = self._clock()
+        soonest = min(
+            self._remaining_seconds(t, now) + (0.0 if t.started_at is not None else self.estimated_wait(t.lane))
+            for t in tickets
+        ) if tickets else 0.0
+        raise AdmissionRejected(
+            429, max(1, math.ceil(soonest)),
+            f"Too many concurrent jobs for this client (limit {self.per_client_limit})"
+        )
+
+    def _retry_after(self, wait: float) -> int:
+        return max(1, math.ceil(wait - self.max_wait_seconds))
+
+    async def run(self, ticket: Ticket, fn: Callable[..., Any], *args) -> Any:
+        """Wait for the ticket's turn, then run fn(*args) in a worker thread."""
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            if len(self._running) >= self.workers or self._waiting:
+                ticket.turn = loop.create_future()
+                heapq.heappush(self._waiting, ticket)
+                await ticket.turn
+            else:
+                self._running.append(ticket)
+
+            ticket.started_at = self._clock()
+            result = await loop.run_in_executor(None, fn, *args)
+
+            elapsed = self._clock() - ticket.started_at
+            if ticket.frames > 0:
+                # Smooth so one odd clip doesn't swing admission decisions
+                measured = elapsed / ticket.frames
+                self.seconds_per_frame = 0.8 * self.seconds_per_frame + 0.2 * measured
+            return result
+
+        finally:
+            self.release(ticket)
+
+    def release(self, ticket: Ticket):
+        """Forget a ticket and hand its worker slot to the next waiting job."""
+
+        if ticket in self._running:
+            self._running.remove(ticket)
+        elif ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+
+        client_tickets = self._admitted.get(ticket.client_id, [])
+        if ticket in client_tickets:
+            client_tickets.remove(ticket)
+        if not client_tickets:
+            self._admitted.pop(ticket.client_id, None)
+
+        while self._waiting and len(self._running) < self.workers:
+            next_ticket = heapq.heappop(self._waiting)
+            if next_ticket.turn.done():
+                continue
+            self._running.append(next_ticket)
+            next_ticket.turn.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._running),
+            "waiting": {lane: sum(1 for t in self._waiting if t.lane == lane) for lane in LANES},
+            "seconds_per_frame": round(self.seconds_per_frame, 4),
+            "estimated_wait_seconds": {lane: round(self.estimated_wait(lane), 1) for lane in LANES},
+            "max_wait_seconds": self.max_wait_seconds,
+            "per_client_limit": self.per_client_limit
+        }
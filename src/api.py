@@ -2,17 +2,24 @@
 FastAPI server for dance pose analysis.
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, Request, UploadFile, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import math
 import os
 import uuid
 import shutil
+import time
 from pathlib import Path
 from typing import Optional
 
 from .video_processor import VideoProcessor
 from .pose_detector import PoseDetector
+from .pose_backends import backend_options
+from .complexity import check_backend, shared_detectors
+from .admission import LANES, AdmissionController, AdmissionRejected
+from .checkpoint import Checkpoint
+from .jobs import create_executor, interrupted_record
 
 
 app = FastAPI(
@@ -31,18 +38,139 @@ app.add_middleware(
 )
 
 BASE_DIR = Path(__file__).parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-OUTPUT_DIR = BASE_DIR / "outputs"
 
-UPLOAD_DIR.mkdir(exist_ok=True)
-OUTPUT_DIR.mkdir(exist_ok=True)
+# With queue workers on other machines, point this at storage they share
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", str(BASE_DIR)))
+UPLOAD_DIR = STORAGE_DIR / "uploads"
+OUTPUT_DIR = STORAGE_DIR / "outputs"
+
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Decode backend: "opencv" (default) or "pyav" for threaded decoding
+DECODE_BACKEND = os.getenv("DECODE_BACKEND", "opencv")
+
+# Pose inference backend: "solutions" (default), "tasks" or "onnx". The
+# latter two need POSE_MODEL_PATH; POSE_BATCH_SIZE and POSE_THREADS tune onnx
+POSE_BACKEND = os.getenv("POSE_BACKEND", "solutions")
 
 # Single detector instance shared across requests for efficiency
-pose_detector = PoseDetector(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-video_processor = VideoProcessor(pose_detector)
+pose_detector = PoseDetector(
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5,
+    backend=POSE_BACKEND,
+    backend_options=backend_options(
+        POSE_BACKEND,
+        model_path=os.getenv("POSE_MODEL_PATH"),
+        batch_size=int(os.getenv("POSE_BATCH_SIZE", "8")),
+        threads=int(os.getenv("POSE_THREADS", "0"))
+    )
+)
+video_processor = VideoProcessor(pose_detector, decode_backend=DECODE_BACKEND)
+
+# Detectors per model complexity, reused by deadline-aware jobs
+complexity_detectors = shared_detectors(pose_detector)
+
+# "local" processes jobs in this process with an in-memory result store; a
+# queue URL such as sqlite:////var/lib/dance/jobs.db (one host) hands them to
+# src/worker.py processes and serves results from the shared store
+JOB_BACKEND = os.getenv("JOB_BACKEND", "local")
+job_executor = create_executor(
+    JOB_BACKEND, video_processor, complexity_detectors,
+    timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", "3600"))
+)
+result_store = job_executor.store
+
+# Processed frames between checkpoints; an interrupted job resumes from the
+# last one (POST /api/resume/{video_id}, or automatically on queue workers).
+# 0 disables checkpointing
+CHECKPOINT_INTERVAL_FRAMES = int(os.getenv("CHECKPOINT_INTERVAL_FRAMES", "300"))
+
+# Local jobs share one detector, so they run one at a time; with queue
+# workers, set ADMISSION_WORKERS to this node's share of them. Admission
+# control rejects uploads whose estimated queueing delay is too long
+admission = AdmissionController(
+    max_wait_seconds=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "120")),
+    per_client_limit=int(os.getenv("ADMISSION_PER_CLIENT_LIMIT", "2")),
+    short_clip_frames=int(os.getenv("ADMISSION_SHORT_CLIP_FRAMES", "900")),
+    workers=1 if JOB_BACKEND == "local" else int(os.getenv("ADMISSION_WORKERS", "1"))
+)
+
+# Per-client limits key on the peer address. Behind a proxy that sets a
+# client header itself, name that header here to key on it instead
+ADMISSION_CLIENT_ID_HEADER = os.getenv("ADMISSION_CLIENT_ID_HEADER", "")
 
-# In-memory store for processed videos
-processed_videos = {}
+
+def client_key(request: Request) -> str:
+    if ADMISSION_CLIENT_ID_HEADER:
+        trusted_id = request.headers.get(ADMISSION_CLIENT_ID_HEADER)
+        if trusted_id:
+            return trusted_id
+    return request.client.host if request.client else "unknown"
+
+
+def completed_response(video_id: str, message: str, video_info: dict) -> dict:
+    return {
+        "success": True,
+        "video_id": video_id,
+        "status": "completed",
+        "processing_info": message,
+        "download": {
+            "url": f"/api/download/{video_id}",
+            "direct_link": f"http://localhost:8000/api/download/{video_id}",
+            "note": "Click the direct_link to download your processed video"
+        },
+        "preview": {
+            "sprite_url": f"/api/preview/{video_id}/sprite",
+            "clip_url": f"/api/preview/{video_id}/clip"
+        },
+        "original_video": video_info
+    }
+
+
+def still_running_response(video_id: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=504,
+        detail={
+            "error": message,
+            "status": "running",
+            "status_url": f"/api/status/{video_id}",
+            "message": "A worker is still processing the video; its result will show up in the status"
+        }
+    )
+
+
+def interrupted_response(video_id: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=500,
+        detail={
+            "error": message,
+            "status": "interrupted",
+            "resume_url": f"/api/resume/{video_id}",
+            "message": "Progress was checkpointed; resume to continue from where processing stopped"
+        }
+    )
+
+
+def remove_files(*paths: Path):
+    """Delete whichever of a job's files and directories exist."""
+    
+    for path in paths:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+
+
+def rejection_response(rejection: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=rejection.status_code,
+        detail={
+            "error": rejection.reason,
+            "retry_after_seconds": rejection.retry_after
+        },
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
 
 
 @app.get("/")
@@ -60,8 +188,12 @@ async def root():
         },
         "endpoints": {
             "upload": "POST /api/analyze",
+            "resume": "POST /api/resume/{video_id}",
             "download": "GET /api/download/{video_id}",
             "status": "GET /api/status/{video_id}",
+            "preview_sprite": "GET /api/preview/{video_id}/sprite",
+            "preview_clip": "GET /api/preview/{video_id}/clip",
+            "queue": "GET /api/queue",
             "health": "GET /health"
         }
     }
@@ -72,9 +204,34 @@ async def health_check():
     return {"status": "healthy", "service": "dance-pose-analyzer"}
 
 
+@app.get("/api/queue")
+async def queue_status():
+    """Current load, measured processing speed and estimated wait per lane."""
+    
+    stats = admission.stats()
+    stats["job_backend"] = "local" if JOB_BACKEND == "local" else JOB_BACKEND.partition("://")[0]
+    if hasattr(job_executor, "queue"):
+        # Shared across all API nodes and workers
+        stats["jobs"] = job_executor.queue.stats()
+    return stats
+
+
 @app.post("/api/analyze")
-async def analyze_video(video: UploadFile = File(...)):
-    """Upload and analyze a dance video."""
+async def analyze_video(request: Request,
+                        video: UploadFile = File(...),
+                        start: Optional[float] = Form(None),
+                        end: Optional[float] = Form(None),
+                        unit: str = Form("seconds"),
+                        frame_step: int = Form(1),
+                        target_fps: Optional[float] = Form(None),
+                        deadline_seconds: Optional[float] = Form(None)):
+    """Upload and analyze a dance video, optionally only a span of it.
+    
+    target_fps / deadline_seconds let the server drop to a lighter pose
+    model when needed to keep up, instead of missing the deadline.
+    Returns 429/503 with Retry-After when the server is too busy; clients
+    are identified by their address (see ADMISSION_CLIENT_ID_HEADER).
+    """
     
     allowed_extensions = {'.mp4', '.avi', '.mov'}
     file_ext = Path(video.filename).suffix.lower()
@@ -90,9 +247,41 @@ async def analyze_video(video: UploadFile = File(...)):
             }
         )
     
+    if target_fps is not None or deadline_seconds is not None:
+        try:
+            check_backend(POSE_BACKEND)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Checks that don't need the video run before it's stored, so a bad
+    # request leaves nothing behind
+    if frame_step < 1:
+        raise HTTPException(status_code=400, detail="frame_step must be at least 1")
+    
+    if unit not in ('seconds', 'frames'):
+        raise HTTPException(status_code=400, detail=f"Unknown range unit '{unit}', expected 'seconds' or 'frames'")
+    
+    if any(value is not None and value <= 0 for value in (target_fps, deadline_seconds)):
+        raise HTTPException(status_code=400, detail="target_fps and deadline_seconds must be positive")
+    
+    client_id = client_key(request)
+    
+    # Turn away obvious overload before the upload is copied into storage
+    # and probed (Starlette has already spooled the body to a temp file)
+    try:
+        admission.check(client_id)
+    except AdmissionRejected as rejection:
+        raise rejection_response(rejection)
+    
     video_id = str(uuid.uuid4())
     input_path = UPLOAD_DIR / f"{video_id}{file_ext}"
     output_path = OUTPUT_DIR / f"{video_id}_processed.mp4"
+    quality_path = OUTPUT_DIR / f"{video_id}_quality.json"
+    sprite_path = OUTPUT_DIR / f"{video_id}_sprite.jpg"
+    preview_clip_path = OUTPUT_DIR / f"{video_id}_preview.mp4"
+    checkpoint_path = OUTPUT_DIR / f"{video_id}_checkpoint"
+    job_files = (input_path, output_path, quality_path, sprite_path, preview_clip_path, checkpoint_path)
+    job = None
     
     try:
         # Save uploaded file
@@ -102,59 +291,134 @@ async def analyze_video(video: UploadFile = File(...)):
         video_info = video_processor.get_video_info(str(input_path))
         
         if video_info is None:
+            input_path.unlink()
             raise HTTPException(status_code=400, detail="Invalid video file")
         
-        # Process video frame-by-frame
-        success, message = video_processor.process_video(
-            str(input_path),
-            str(output_path),
-            show_progress=True
-        )
+        try:
+            start_frame, end_frame = VideoProcessor.resolve_frame_range(
+                start, end, unit, video_info["fps"], video_info["frame_count"]
+            )
+        except ValueError as e:
+            input_path.unlink()
+            raise HTTPException(status_code=400, detail=str(e))
         
-        if not success:
-            raise HTTPException(status_code=500, detail=message)
+        # Unknown length goes in the long lane
+        if end_frame is not None:
+            job_frames = math.ceil((end_frame - start_frame) / frame_step)
+        else:
+            job_frames = admission.short_clip_frames + 1
         
-        processed_videos[video_id] = {
+        try:
+            ticket = admission.admit(client_id, job_frames)
+        except AdmissionRejected as rejection:
+            input_path.unlink()
+            raise rejection_response(rejection)
+        
+        job = {
+            "video_id": video_id,
             "original_filename": video.filename,
             "input_path": str(input_path),
             "output_path": str(output_path),
-            "status": "completed",
-            "message": message,
-            "video_info": video_info
+            "quality_path": str(quality_path),
+            "sprite_path": str(sprite_path),
+            "preview_clip_path": str(preview_clip_path),
+            "video_info": video_info,
+            "start_frame": start_frame,
+            "end_frame": end_frame,
+            "frame_step": frame_step,
+            "target_fps": target_fps,
+            "deadline_seconds": deadline_seconds,
+            # Wall clock, so workers on other machines can tell how long it queued
+            "accepted_at": time.time(),
+            "checkpoint_path": str(checkpoint_path) if CHECKPOINT_INTERVAL_FRAMES > 0 else None,
+            "checkpoint_interval": CHECKPOINT_INTERVAL_FRAMES
         }
         
-        return {
-            "success": True,
-            "video_id": video_id,
-            "status": "completed",
-            "processing_info": message,
-            "download": {
-                "url": f"/api/download/{video_id}",
-                "direct_link": f"http://localhost:8000/api/download/{video_id}",
-                "note": "Click the direct_link to download your processed video"
-            },
-            "original_video": video_info
-        }
+        # Process here or on a queue worker once it's our turn; either way
+        # the record ends up in result_store. Short clips jump the shared queue
+        success, record = await admission.run(ticket, job_executor.run, job, LANES.index(ticket.lane))
+        
+        if not success:
+            if record["status"] == "interrupted":
+                raise interrupted_response(video_id, record["message"])
+            if record["status"] == "running":
+                # The worker still needs the files; the record makes them
+                # visible to /api/status and /api/cleanup until it's done
+                result_store.put(video_id, {**job, "status": "running", "message": record["message"]})
+                raise still_running_response(video_id, record["message"])
+            # No record is stored for a failed upload, so nothing could
+            # clean these up later
+            remove_files(*job_files)
+            raise HTTPException(status_code=500, detail=record["message"])
+        
+        return completed_response(video_id, record["message"], video_info)
     
     except HTTPException:
         raise
     except Exception as e:
-        if input_path.exists():
-            input_path.unlink()
-        if output_path.exists():
-            output_path.unlink()
+        # Keep the upload and checkpoint so the job can be resumed
+        if job is not None and Checkpoint(str(checkpoint_path)).exists():
+            result_store.put(video_id, interrupted_record(job, f"Processing failed: {str(e)}"))
+            raise interrupted_response(video_id, f"Processing failed: {str(e)}")
         
+        remove_files(*job_files)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 
+@app.post("/api/resume/{video_id}")
+async def resume_video(request: Request, video_id: str):
+    """Continue an interrupted job from its last checkpoint."""
+    
+    video_data = result_store.get(video_id)
+    if video_data is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if video_data["status"] != "interrupted":
+        raise HTTPException(status_code=409, detail=f"Video is {video_data['status']}, not interrupted")
+    
+    job = video_data["job"]
+    client_id = client_key(request)
+    
+    # Only the frames after the checkpoint count towards the estimated wait
+    checkpoint = video_data["checkpoint"] or {"next_frame": job["start_frame"]}
+    if job["end_frame"] is not None:
+        job_frames = math.ceil(max(job["end_frame"] - checkpoint["next_frame"], 0) / job["frame_step"])
+    else:
+        job_frames = admission.short_clip_frames + 1
+    
+    try:
+        ticket = admission.admit(client_id, job_frames)
+    except AdmissionRejected as rejection:
+        raise rejection_response(rejection)
+    
+    # Stops a second resume of the same job while this one runs
+    result_store.put(video_id, {**video_data, "status": "resuming"})
+    
+    try:
+        success, record = await admission.run(ticket, job_executor.run, job, LANES.index(ticket.lane))
+    except Exception as e:
+        success, record = False, {"status": "failed", "message": f"Processing failed: {str(e)}"}
+    
+    if not success:
+        if record["status"] == "running":
+            result_store.put(video_id, {**video_data, "status": "running", "message": record["message"]})
+            raise still_running_response(video_id, record["message"])
+        if Checkpoint(job["checkpoint_path"]).exists():
+            result_store.put(video_id, interrupted_record(job, record["message"]))
+            raise interrupted_response(video_id, record["message"])
+        result_store.put(video_id, {**video_data, "status": "failed", "message": record["message"]})
+        raise HTTPException(status_code=500, detail=record["message"])
+    
+    return completed_response(video_id, record["message"], job["video_info"])
+
+
 @app.get("/api/download/{video_id}")
 async def download_video(video_id: str):
     """Download processed video with skeleton overlay."""
     
-    if video_id not in processed_videos:
+    video_data = result_store.get(video_id)
+    if video_data is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video_data = processed_videos[video_id]
     output_path = video_data["output_path"]
     
     if not os.path.exists(output_path):
@@ -167,38 +431,96 @@ async def download_video(video_id: str):
     )
 
 
+@app.get("/api/preview/{video_id}/sprite")
+async def preview_sprite(video_id: str):
+    """Sprite sheet of skeleton thumbnails; layout is in the status "preview" field."""
+    
+    video_data = result_store.get(video_id)
+    if video_data is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    sprite_path = video_data["sprite_path"]
+    
+    if not os.path.exists(sprite_path):
+        raise HTTPException(status_code=404, detail="Preview sprite not found")
+    
+    return FileResponse(sprite_path, media_type="image/jpeg")
+
+
+@app.get("/api/preview/{video_id}/clip")
+async def preview_clip(video_id: str):
+    """Short low-resolution time-lapse of the processed video."""
+    
+    video_data = result_store.get(video_id)
+    if video_data is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    preview_clip_path = video_data["preview_clip_path"]
+    
+    if not os.path.exists(preview_clip_path):
+        raise HTTPException(status_code=404, detail="Preview clip not found")
+    
+    return FileResponse(preview_clip_path, media_type="video/mp4")
+
+
 @app.get("/api/status/{video_id}")
 async def get_status(video_id: str):
-    """Get processing status and metadata."""
+    """Get processing status, metadata and detection quality metrics."""
     
-    if video_id not in processed_videos:
+    video_data = result_store.get(video_id)
+    if video_data is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return processed_videos[video_id]
+    return video_data
 
 
 @app.delete("/api/cleanup/{video_id}")
 async def cleanup_video(video_id: str):
     """Delete video files to free up storage."""
     
-    if video_id not in processed_videos:
+    video_data = result_store.get(video_id)
+    if video_data is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video_data = processed_videos[video_id]
     
-    for path_key in ["input_path", "output_path"]:
+    for path_key in ["input_path", "output_path", "quality_path", "sprite_path", "preview_clip_path"]:
         path = Path(video_data[path_key])
         if path.exists():
             path.unlink()
     
-    del processed_videos[video_id]
+    if video_data.get("checkpoint_path"):
+        shutil.rmtree(video_data["checkpoint_path"], ignore_errors=True)
+    
+    result_store.delete(video_id)
     
     return {"message": "Video files cleaned up successfully"}
 
 
+@app.on_event("startup")
+async def recover_interrupted_jobs():
+    """List jobs a previous run of this process left checkpointed as resumable.
+    
+    Queue workers recover their own jobs through lease expiry.
+    """
+    
+    if JOB_BACKEND != "local":
+        return
+    
+    for checkpoint_path in OUTPUT_DIR.glob("*_checkpoint"):
+        job = Checkpoint.load_job(str(checkpoint_path))
+        if job is None or result_store.get(job["video_id"]) is not None:
+            continue
+        if not Checkpoint(str(checkpoint_path)).exists() or not os.path.exists(job["input_path"]):
+            continue
+        result_store.put(job["video_id"], interrupted_record(job, "Processing was interrupted by a server restart"))
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     video_processor.cleanup()
+    for complexity, detector in complexity_detectors.items():
+        if detector is not pose_detector:
+            detector.cleanup()
 
 
 if __name__ == "__main__":
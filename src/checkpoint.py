@@ -0,0 +1,267 @@
+"""
+Checkpoints that let an interrupted processing job resume where it stopped.
+"""
+
+import cv2
+import json
+import os
+import shutil
+import numpy as np
+from fractions import Fraction
+from typing import List, Optional
+
+from mediapipe.framework.formats import landmark_pb2
+
+from .decoders import av
+
+
+STATE_FILE = "state.json"
+JOB_FILE = "job.json"
+
+
+def landmarks_to_array(landmarks: any) -> np.ndarray:
+    """(33, 4) array of x, y, z, visibility; all NaN when no pose was found."""
+
+    if landmarks is None:
+        return np.full((33, 4), np.nan, dtype=np.float32)
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark], dtype=np.float32)
+
+
+def array_to_landmarks(values: np.ndarray) -> Optional[any]:
+    """Inverse of landmarks_to_array, giving what PoseDetector.detect_pose returns."""
+
+    if np.isnan(values).all():
+        return None
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in values.tolist():
+        landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmarks
+
+
+class Checkpoint:
+    """Segmented output plus saved state for VideoProcessor.process_video.
+
+    With a checkpoint, output is encoded in segments of `interval` processed
+    frames inside `directory`. Each finished segment is committed together
+    with the landmarks of its frames and the next frame to process, so a
+    crash loses at most one segment of work. A restarted job skips to that
+    frame, runs the detector over `warmup_frames` sampled frames before it
+    to re-seed tracking, and rebuilds quality/preview data from the saved
+    landmarks and segments. The segments are joined into the final output
+    once the whole span is done, and the directory is removed.
+    """
+
+    def __init__(self, directory: str, interval: int = 300, warmup_frames: int = 10):
+        if interval < 1:
+            raise ValueError(f"Checkpoint interval must be at least 1 frame, got {interval}")
+
+        self.directory = directory
+        self.interval = interval
+        self.warmup_frames = warmup_frames
+        self.params: dict = {}
+        self.next_frame: Optional[int] = None
+        self.segments: List[dict] = []
+        self.resumed = False
+
+    @property
+    def frames_done(self) -> int:
+        return sum(segment["frames"] for segment in self.segments)
+
+    @property
+    def frames_with_pose(self) -> int:
+        return sum(segment["frames_with_pose"] for segment in self.segments)
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, STATE_FILE))
+
+    def load(self, params: dict) -> bool:
+        """Pick up saved state if it was written for the same job parameters.
+
+        Returns True when resuming; otherwise any stale state is discarded.
+        """
+
+        self.params = params
+        state_path = os.path.join(self.directory, STATE_FILE)
+
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state["params"] == params:
+                self.next_frame = state["next_frame"]
+                self.segments = state["segments"]
+                self.resumed = True
+                return True
+
+        # Stale checkpoint (different input or range), start over
+        self._remove_segments()
+        self.next_frame = None
+        self.segments = []
+        self.resumed = False
+        os.makedirs(self.directory, exist_ok=True)
+        return False
+
+    def _remove_segments(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != JOB_FILE:
+                os.remove(os.path.join(self.directory, name))
+
+    def segment_path(self) -> str:
+        """Path for the next segment to encode."""
+        return os.path.join(self.directory, f"segment_{len(self.segments):05d}.mp4")
+
+    def commit_segment(self, frames: List[int], landmarks: List[np.ndarray], next_frame: int):
+        """Record the just-closed segment and the frame to resume from."""
+
+        index = len(self.segments)
+        landmarks_path = os.path.join(self.directory, f"segment_{index:05d}_landmarks.npz")
+        stacked = np.stack(landmarks) if landmarks else np.empty((0, 33, 4), dtype=np.float32)
+        np.savez(landmarks_path, frames=np.array(frames, dtype=np.int64), landmarks=stacked)
+
+        self.segments.append({
+            "video": os.path.basename(self.segment_path()),
+            "landmarks": os.path.basename(landmarks_path),
+            "first_frame": frames[0] if frames else next_frame,
+            "last_frame": frames[-1] if frames else next_frame - 1,
+            "frames": len(frames),
+            "frames_with_pose": int(sum(not np.isnan(values).all() for values in landmarks))
+        })
+        self.next_frame = next_frame
+        self._write_state()
+
+    def _write_state(self):
+        state = {
+            "params": self.params,
+            "next_frame": self.next_frame,
+            "segments": self.segments
+        }
+        # Write-then-rename so a crash never leaves half a state file
+        tmp_path = os.path.join(self.directory, STATE_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
+
+    def replay(self, quality_report=None, preview_builder=None):
+        """Feed committed frames to a fresh quality report and preview builder."""
+
+        for segment in self.segments:
+            saved = np.load(os.path.join(self.directory, segment["landmarks"]))
+            frames = saved["frames"].tolist()
+
+            if quality_report is not None:
+                for frame_index, values in zip(frames, saved["landmarks"]):
+                    quality_report.update(frame_index, array_to_landmarks(values))
+
+            if preview_builder is not None:
+                # Segments hold rendered frames, so previews need no detection
+                cap = cv2.VideoCapture(os.path.join(self.directory, segment["video"]))
+                for frame_index in frames:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    preview_builder.add(frame_index, frame)
+                cap.release()
+
+    def concatenate(self, output_path: str, fps: float, size) -> bool:
+        """Join the committed segments into output_path.
+
+        Segment packets are copied into one file with shifted timestamps,
+        so frames are encoded only once. Without PyAV, or with no segments,
+        the frames are re-encoded instead.
+        """
+
+        if av is None or not self.segments:
+            return self._reencode(output_path, fps, size)
+
+        try:
+            output = av.open(output_path, 'w')
+        except (av.FFmpegError, OSError):
+            return False
+
+        try:
+            stream = None
+            offset = Fraction(0)
+
+            for segment in self.segments:
+                with av.open(os.path.join(self.directory, segment["video"])) as source:
+                    source_stream = source.streams.video[0]
+                    if stream is None:
+                        stream = output.add_stream_from_template(source_stream)
+
+                    time_base = source_stream.time_base
+                    shift = int(offset / time_base)
+                    segment_end = 0
+
+                    for packet in source.demux(source_stream):
+                        if packet.dts is None:
+                            # Demuxer flush packet, carries no data
+                            continue
+                        segment_end = max(segment_end, (packet.pts if packet.pts is not None else packet.dts)
+                                          + (packet.duration or 0))
+                        packet.dts += shift
+                        if packet.pts is not None:
+                            packet.pts += shift
+                        packet.stream = stream
+                        output.mux(packet)
+
+                    offset += segment_end * time_base
+        except (av.FFmpegError, OSError):
+            return False
+        finally:
+            output.close()
+
+        return True
+
+    def _reencode(self, output_path: str, fps: float, size) -> bool:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, fps, size)
+        if not out.isOpened():
+            return False
+
+        try:
+            for segment in self.segments:
+                cap = cv2.VideoCapture(os.path.join(self.directory, segment["video"]))
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    out.write(frame)
+                cap.release()
+        finally:
+            out.release()
+        return True
+
+    def save_job(self, job: dict):
+        """Keep the job description next to the checkpoint so it can be resumed
+        even after the process that accepted it is gone."""
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, JOB_FILE), "w") as f:
+            json.dump(job, f)
+
+    @staticmethod
+    def load_job(directory: str) -> Optional[dict]:
+        path = os.path.join(directory, JOB_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def clear(self):
+        """Remove the checkpoint directory once the output is complete."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def load_state(self) -> Optional[dict]:
+        """Progress saved on disk (next_frame, segments, frames_done), or None."""
+
+        state_path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path) as f:
+            state = json.load(f)
+        return {
+            "next_frame": state["next_frame"],
+            "segments": len(state["segments"]),
+            "frames_done": sum(segment["frames"] for segment in state["segments"])
+        }
@@ -0,0 +1,238 @@
+"""
+Deadline-aware switching between MediaPipe model complexity levels.
+"""
+
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .pose_detector import PoseDetector
+
+
+# Relative per-frame cost of each level, used to guess the speed of levels
+# that haven't run yet on this machine (see compare_model_settings)
+DEFAULT_RELATIVE_COST = {0: 0.4, 1: 1.0, 2: 2.2}
+
+
+def check_backend(backend_name: str):
+    """Raise ValueError unless complexity switching works on backend_name.
+
+    The levels are MediaPipe Solutions models, so switching on any other
+    backend would silently replace it.
+    """
+    if backend_name != "solutions":
+        raise ValueError(f"target_fps/deadline_seconds need the solutions pose backend, not {backend_name}")
+
+
+def shared_detectors(pose_detector: PoseDetector) -> Dict[int, PoseDetector]:
+    """Levels a controller can reuse pose_detector for, so they aren't loaded twice."""
+
+    if pose_detector.backend.name != "solutions":
+        return {}
+    return {pose_detector.model_complexity: pose_detector}
+
+
+class ComplexityController:
+    """Picks the most accurate model complexity that keeps up with a target.
+
+    The target is a throughput (target_fps), a deadline for the whole job
+    (deadline_seconds, measured from begin() plus waited_seconds already
+    spent queueing before it), or both. Live throughput is
+    measured every `window` frames and the level is moved up or down, each
+    level using its own PoseDetector instance.
+    """
+
+    def __init__(self,
+                 target_fps: Optional[float] = None,
+                 deadline_seconds: Optional[float] = None,
+                 levels: Sequence[int] = (0, 1, 2),
+                 initial_level: int = 1,
+                 window: int = 15,
+                 headroom: float = 0.2,
+                 detectors: Optional[Dict[int, PoseDetector]] = None,
+                 min_detection_confidence: float = 0.5,
+                 min_tracking_confidence: float = 0.5,
+                 waited_seconds: float = 0.0,
+                 clock: Callable[[], float] = time.perf_counter):
+
+        if target_fps is None and deadline_seconds is None:
+            raise ValueError("ComplexityController needs target_fps or deadline_seconds")
+        if initial_level not in levels:
+            raise ValueError(f"initial_level {initial_level} is not one of {list(levels)}")
+
+        self.target_fps = target_fps
+        self.deadline_seconds = deadline_seconds
+        self.waited_seconds = waited_seconds
+        self.levels = sorted(levels)
+        self.level = initial_level
+        self.window = window
+        self.headroom = headroom
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self._clock = clock
+
+        # Detectors passed in are shared with the caller, who owns their cleanup
+        self._owns_detectors = detectors is None
+        self.detectors = detectors if detectors is not None else {}
+
+        self._level_fps: Dict[int, float] = {}
+        self._previous_level = initial_level
+        self.segments: List[dict] = []
+        self.total_frames: Optional[int] = None
+        self.frames_done = 0
+        self.elapsed_seconds: Optional[float] = None
+
+    @property
+    def detector(self) -> PoseDetector:
+        """Detector for the current level, created on first use."""
+
+        while self.level not in self.detectors:
+            try:
+                self.detectors[self.level] = PoseDetector(
+                    min_detection_confidence=self.min_detection_confidence,
+                    min_tracking_confidence=self.min_tracking_confidence,
+                    model_complexity=self.level
+                )
+            except Exception:
+                # Lite/heavy models are downloaded on first use; if that
+                # fails, drop the level and go back to the one we came from
+                if len(self.levels) == 1:
+                    raise
+                self.levels.remove(self.level)
+                self.level = self._previous_level if self._previous_level in self.levels else self.levels[-1]
+                self._reopen_previous_segment()
+        return self.detectors[self.level]
+
+    def begin(self, total_frames: Optional[int], first_frame: int = 0):
+        """Start timing a job that will process total_frames frames."""
+
+        self.total_frames = total_frames
+        self.frames_done = 0
+        self.segments = []
+        self._segment_starts = []
+        self.elapsed_seconds = None
+        self._started = self._clock()
+        self._open_segment(first_frame)
+
+    def update(self, frame_index: int):
+        """Record that frame_index has been fully processed."""
+
+        now = self._clock()
+        self.frames_done += 1
+        segment = self.segments[-1]
+        segment["end_frame"] = frame_index
+        segment["frames"] += 1
+
+        # The first frame on a level pays for model loading and a fresh
+        # detection, so throughput is measured from the end of it
+        if self._window_started is None:
+            self._window_started = now
+            return
+
+        self._window_frames += 1
+        if self._window_frames < self.window:
+            return
+
+        window_fps = self._window_frames / max(now - self._window_started, 1e-6)
+        previous = self._level_fps.get(self.level)
+        self._level_fps[self.level] = window_fps if previous is None else 0.5 * (previous + window_fps)
+        self._window_frames = 0
+        self._window_started = now
+
+        required = self._required_fps(now)
+        if required is None:
+            return
+
+        level = self._choose_level(required)
+        if level != self.level:
+            self._close_segment(now)
+            self._previous_level = self.level
+            self.level = level
+            self._open_segment(frame_index + 1)
+
+    def finish(self):
+        """Stop timing. Drops a trailing segment that processed no frames."""
+
+        if self.segments and self.segments[-1]["frames"] == 0:
+            self.segments.pop()
+        elif self.segments:
+            self._close_segment(self._clock())
+        # Counted from when the job was accepted, like the deadline
+        self.elapsed_seconds = self.waited_seconds + self._clock() - self._started
+
+    def _required_fps(self, now: float) -> Optional[float]:
+        required = []
+        if self.target_fps is not None:
+            required.append(self.target_fps)
+
+        if self.deadline_seconds is not None and self.total_frames:
+            remaining_frames = max(self.total_frames - self.frames_done, 0)
+            remaining_time = self.deadline_seconds - self.waited_seconds - (now - self._started)
+            if remaining_frames and remaining_time <= 0:
+                required.append(math.inf)
+            elif remaining_frames:
+                required.append(remaining_frames / remaining_time)
+
+        return max(required) if required else None
+
+    def _estimated_fps(self, level: int) -> float:
+        if level in self._level_fps:
+            return self._level_fps[level]
+
+        # Scale the current level's measurement by the relative model cost
+        current_fps = self._level_fps[self.level]
+        return current_fps * DEFAULT_RELATIVE_COST.get(self.level, 1.0) / DEFAULT_RELATIVE_COST.get(level, 1.0)
+
+    def _choose_level(self, required: float) -> int:
+        # Moving up needs headroom so we don't oscillate around the target
+        candidates = [
+            level for level in self.levels
+            if self._estimated_fps(level) >= required * (1 + self.headroom if level > self.level else 1)
+        ]
+        return max(candidates) if candidates else self.levels[0]
+
+    def _open_segment(self, start_frame: int):
+        self.segments.append({
+            "model_complexity": self.level,
+            "start_frame": start_frame,
+            "end_frame": None,
+            "frames": 0,
+            "fps": None
+        })
+        self._segment_starts.append(self._clock())
+        self._window_frames = 0
+        self._window_started = None
+
+    def _reopen_previous_segment(self):
+        # Nothing ran on the failed level, so continue the segment before it
+        if len(self.segments) > 1 and self.segments[-2]["model_complexity"] == self.level:
+            self.segments.pop()
+            self._segment_starts.pop()
+            self.segments[-1]["fps"] = None
+        else:
+            self.segments[-1]["model_complexity"] = self.level
+
+    def _close_segment(self, now: float):
+        segment = self.segments[-1]
+        segment["fps"] = round(segment["frames"] / max(now - self._segment_starts[-1], 1e-6), 2)
+
+    def to_dict(self) -> dict:
+        """Summary of targets and which complexity processed which frames."""
+
+        elapsed = self.elapsed_seconds
+
+        return {
+            "target_fps": self.target_fps,
+            "deadline_seconds": self.deadline_seconds,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "met_deadline": (elapsed <= self.deadline_seconds)
+                            if elapsed is not None and self.deadline_seconds is not None else None,
+            "segments": self.segments
+        }
+
+    def cleanup(self):
+        if self._owns_detectors:
+            for detector in self.detectors.values():
+                detector.cleanup()
+            self.detectors.clear()
@@ -0,0 +1,234 @@
+"""
+Video decode backends used by VideoProcessor.
+
+Both backends expose the same small interface (seek/grab/read/release plus
+width, height, fps, frame_count, rotation and timestamp) so the processing
+loop doesn't care where frames come from. `color` tells the caller whether
+frames are BGR (OpenCV) or RGB (PyAV).
+"""
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+try:
+    import av
+except ImportError:  # PyAV is optional, only needed for the 'pyav' backend
+    av = None
+
+
+DECODE_BACKENDS = ('opencv', 'pyav')
+
+
+class OpenCVDecoder:
+    """Decodes with cv2.VideoCapture. Frames are fresh BGR arrays."""
+
+    color = 'bgr'
+
+    def __init__(self, path: str):
+        self.cap = cv2.VideoCapture(path)
+        self.timestamp = 0.0
+
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Reported only; whether frames come out rotated depends on the
+        # build's CAP_PROP_ORIENTATION_AUTO default
+        self.rotation = int(self.cap.get(cv2.CAP_PROP_ORIENTATION_META)) % 360
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def seek(self, frame_index: int) -> int:
+        """Position just before frame_index. Returns the index actually reached."""
+
+        # The FFmpeg backend jumps to the preceding keyframe and decodes
+        # forward from there, so cost is bounded by the GOP length
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        if position > frame_index or position < 0:
+            # Overshot or unseekable stream, rewind and walk forward
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            position = 0
+
+        while position < frame_index and self.cap.grab():
+            position += 1
+
+        return position
+
+    def grab(self) -> bool:
+        """Advance one frame without converting it to pixels."""
+        return self.cap.grab()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.cap.read()
+        if ret:
+            self.timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class PyAVDecoder:
+    """Decodes with PyAV/libav using codec frame threading.
+
+    Frames are converted to RGB (optionally downscaled to max_width) by
+    libswscale, which allocates a new frame each time; the pixels are then
+    copied into a fixed ring of buffers so callers get arrays they can hold
+    on to. A returned frame stays valid for pool_size - 1 further reads.
+    Rotation metadata is applied so phone recordings come out upright.
+    """
+
+    color = 'rgb'
+
+    def __init__(self,
+                 path: str,
+                 thread_count: int = 0,
+                 max_width: Optional[int] = None,
+                 pool_size: int = 3):
+
+        if av is None:
+            raise ImportError("The 'pyav' decode backend requires PyAV (pip install av)")
+
+        self.timestamp = 0.0
+        self.width = self.height = self.frame_count = self.rotation = 0
+        self.fps = 0.0
+        self._pending = None
+
+        try:
+            self.container = av.open(path)
+            self.stream = self.container.streams.video[0]
+        except (av.FFmpegError, IndexError, OSError):
+            self.container = None
+            return
+
+        # thread_count=0 lets libav pick one thread per core
+        self.stream.thread_type = 'AUTO'
+        self.stream.codec_context.thread_count = thread_count
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self._time_base = float(self.stream.time_base)
+        self._start_pts = self.stream.start_time or 0
+        self.frame_count = self.stream.frames or self._estimate_frame_count()
+
+        self._frames = self.container.decode(self.stream)
+        first = self._next_frame()
+        if first is None:
+            self.container.close()
+            self.container = None
+            return
+        self._pending = first
+
+        # Display matrix angle is counterclockwise; report clockwise like
+        # the 'rotate' tag phones write and OpenCV's ORIENTATION_META
+        self.rotation = int(round(-first.rotation)) % 360
+        self._quarter_turns = (-self.rotation // 90) % 4
+
+        src_width, src_height = first.width, first.height
+        if max_width and src_width > max_width:
+            src_height = int(round(src_height * max_width / src_width / 2)) * 2
+            src_width = max_width
+        self._scaled_size = (src_width, src_height)
+
+        if self._quarter_turns % 2:
+            self.width, self.height = src_height, src_width
+        else:
+            self.width, self.height = src_width, src_height
+
+        self._pool = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(pool_size)]
+        self._pool_index = 0
+
+    def _estimate_frame_count(self) -> int:
+        if self.stream.duration:
+            seconds = self.stream.duration * self._time_base
+        elif self.container.duration:
+            seconds = self.container.duration / av.time_base
+        else:
+            return 0
+        return int(round(seconds * self.fps))
+
+    def _next_frame(self):
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            return frame
+        try:
+            return next(self._frames)
+        except (StopIteration, av.FFmpegError):
+            return None
+
+    def _frame_index(self, frame) -> Optional[int]:
+        if frame.pts is None or not self.fps:
+            return None
+        return int(round((frame.pts - self._start_pts) * self._time_base * self.fps))
+
+    def is_opened(self) -> bool:
+        return self.container is not None
+
+    def seek(self, frame_index: int) -> int:
+        """Seek to the keyframe before frame_index and decode forward to it."""
+
+        target_pts = self._start_pts + int(frame_index / self.fps / self._time_base)
+        self.container.seek(target_pts, stream=self.stream, backward=True, any_frame=False)
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+
+        # Frames before the target are decoded (needed for references) but
+        # never converted to RGB
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return frame_index
+            position = self._frame_index(frame)
+            if position is None or position >= frame_index:
+                self._pending = frame
+                return frame_index if position is None else position
+
+    def grab(self) -> bool:
+        """Advance one frame without converting it to pixels."""
+        return self._next_frame() is not None
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+
+        if frame.pts is not None:
+            self.timestamp = (frame.pts - self._start_pts) * self._time_base
+        elif self.fps:
+            self.timestamp += 1 / self.fps
+
+        width, height = self._scaled_size
+        rgb = frame.reformat(width=width, height=height, format='rgb24')
+
+        # View the libav plane (rows may be padded to line_size); the copy
+        # below drops the padding and any rotation stride
+        plane = rgb.planes[0]
+        pixels = np.frombuffer(plane, dtype=np.uint8).reshape(height, plane.line_size)
+        pixels = pixels[:, :width * 3].reshape(height, width, 3)
+        if self._quarter_turns:
+            pixels = np.rot90(pixels, self._quarter_turns)
+
+        buffer = self._pool[self._pool_index]
+        self._pool_index = (self._pool_index + 1) % len(self._pool)
+        np.copyto(buffer, pixels)
+
+        return True, buffer
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+
+def open_decoder(path: str, backend: str = 'opencv', **options):
+    """Create a decoder for path. Check is_opened() before use."""
+
+    if backend == 'opencv':
+        return OpenCVDecoder(path, **options)
+    if backend == 'pyav':
+        return PyAVDecoder(path, **options)
+    raise ValueError(f"Unknown decode backend '{backend}', expected one of {DECODE_BACKENDS}")
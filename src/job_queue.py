@@ -0,0 +1,291 @@
+"""
+Job queue and result store backends shared by API nodes and workers.
+
+A backend is named by a URL, e.g. "sqlite:///data/jobs.db". SQLite is the
+bundled stand-in for tests and single-host setups (WAL mode needs every
+process on one host); multi-machine backends (Redis, Postgres, ...) plug in
+with register_backend() without touching the API.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple
+
+
+class Job:
+    """A claimed job: its id, payload and how often it has been attempted."""
+
+    def __init__(self, job_id: str, payload: dict, attempts: int):
+        self.id = job_id
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue(ABC):
+    """Queue where workers hold jobs under a lease they keep renewing.
+
+    A job whose lease runs out (its worker died or hung) becomes claimable
+    again, up to max_attempts claims in total.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_id: str, payload: dict, priority: int = 0):
+        """Add a job. Lower priority values are claimed first.
+
+        Re-enqueueing a done or failed job queues it again (e.g. to resume
+        it from a checkpoint); a queued or running job is left alone.
+        """
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Take the next available job, or None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease. False means the worker no longer owns the job."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str) -> bool:
+        """Mark a job done. False if the lease had been lost."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job permanently failed. False if the lease had been lost."""
+
+    @abstractmethod
+    def cancel(self, job_id: str, error: str) -> bool:
+        """Fail a job no worker has claimed yet. False if it is running or finished."""
+
+    @abstractmethod
+    def state(self, job_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(state, error) for a job, state being queued/running/done/failed."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Number of jobs per state."""
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.5) -> Tuple[str, Optional[str]]:
+        """Block until a job is done or failed. Returns (state, error)."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self.state(job_id)
+            if current is None:
+                return "failed", "Job disappeared from the queue"
+            if current[0] in ("done", "failed"):
+                return current
+            if deadline is not None and time.monotonic() >= deadline:
+                return "failed", f"Timed out after {timeout} seconds waiting for a worker"
+            time.sleep(poll_interval)
+
+
+class ResultStore(ABC):
+    """Job records (the data /api/status returns), keyed by video_id."""
+
+    @abstractmethod
+    def get(self, video_id: str) -> Optional[dict]:
+        """The stored record, or None."""
+
+    @abstractmethod
+    def put(self, video_id: str, record: dict):
+        """Insert or replace a record."""
+
+    @abstractmethod
+    def delete(self, video_id: str):
+        """Remove a record if present."""
+
+
+class MemoryResultStore(ResultStore):
+    """Process-local store, for a single API process doing its own processing."""
+
+    def __init__(self):
+        self._records: Dict[str, dict] = {}
+
+    def get(self, video_id: str) -> Optional[dict]:
+        return self._records.get(video_id)
+
+    def put(self, video_id: str, record: dict):
+        self._records[video_id] = record
+
+    def delete(self, video_id: str):
+        self._records.pop(video_id, None)
+
+
+class _SQLiteBackend:
+    """Opens a fresh connection per call so instances are thread-safe."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            self._create_tables(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; multi-statement updates use explicit BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(_SQLiteBackend, JobQueue):
+    """JobQueue in a SQLite file, safe across processes on one host."""
+
+    def __init__(self, path: str, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.max_attempts = max_attempts
+        self._clock = clock
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'queued',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (state, priority, enqueued_at)")
+
+    def enqueue(self, job_id: str, payload: dict, priority: int = 0):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, priority, enqueued_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET payload = excluded.payload, priority = excluded.priority, "
+                "state = 'queued', worker = NULL, lease_expires = NULL, attempts = 0, "
+                "enqueued_at = excluded.enqueued_at, error = NULL "
+                "WHERE jobs.state IN ('done', 'failed')",
+                (job_id, json.dumps(payload), priority, self._clock())
+            )
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        now = self._clock()
+        conn = self._connect()
+        try:
+            # Take the write lock up front so two workers can't claim one job
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Jobs whose lease ran out too many times are poison, give up
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', worker = NULL, "
+                "error = 'Lease expired ' || attempts || ' times' "
+                "WHERE state = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE state = 'queued' OR (state = 'running' AND lease_expires < ?) "
+                "ORDER BY priority, enqueued_at LIMIT 1",
+                (now,)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET state = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, job_id)
+            )
+            conn.execute("COMMIT")
+            return Job(job_id, json.loads(payload), attempts + 1)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update_owned(self, job_id: str, worker_id: str, assignments: str, values: tuple) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND state = 'running'",
+                values + (job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return self._update_owned(job_id, worker_id, "lease_expires = ?", (self._clock() + lease_seconds,))
+
+    def complete(self, job_id: str, worker_id: str) -> bool:
+        return self._update_owned(job_id, worker_id, "state = 'done', lease_expires = NULL", ())
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._update_owned(job_id, worker_id, "state = 'failed', lease_expires = NULL, error = ?", (error,))
+
+    def cancel(self, job_id: str, error: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'failed', error = ? WHERE id = ? AND state = 'queued'",
+                (error, job_id)
+            )
+            return cursor.rowcount == 1
+
+    def state(self, job_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT state, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+
+class SQLiteResultStore(_SQLiteBackend, ResultStore):
+    """ResultStore in a SQLite file, readable by every API process."""
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, record TEXT NOT NULL)")
+
+    def get(self, video_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM results WHERE id = ?", (video_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, video_id: str, record: dict):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO results (id, record) VALUES (?, ?)", (video_id, json.dumps(record)))
+
+    def delete(self, video_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE id = ?", (video_id,))
+
+
+def _open_sqlite(location: str) -> Tuple[JobQueue, ResultStore]:
+    return SQLiteJobQueue(location), SQLiteResultStore(location)
+
+
+_BACKENDS: Dict[str, Callable[[str], Tuple[JobQueue, ResultStore]]] = {
+    "sqlite": _open_sqlite
+}
+
+
+def register_backend(scheme: str, factory: Callable[[str], Tuple[JobQueue, ResultStore]]):
+    """Make "<scheme>://<location>" URLs open (queue, store) via factory(location)."""
+    _BACKENDS[scheme] = factory
+
+
+def open_backend(url: str) -> Tuple[JobQueue, ResultStore]:
+    """Open the queue and result store named by url, e.g. sqlite:///data/jobs.db."""
+
+    scheme, separator, location = url.partition("://")
+    if not separator or scheme not in _BACKENDS:
+        raise ValueError(f"Unknown job backend '{url}', expected one of: "
+                         + ", ".join(f"{name}://..." for name in _BACKENDS))
+    return _BACKENDS[scheme](location)
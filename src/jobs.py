@@ -0,0 +1,210 @@
+"""
+Running analysis jobs, either in the API process or on queue workers.
+
+A job is a plain dict (so it can travel through a JobQueue) describing the
+uploaded file, where outputs go and the processing options. Executing it
+produces the record that /api/status serves.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .checkpoint import Checkpoint
+from .complexity import ComplexityController, check_backend
+from .job_queue import JobQueue, MemoryResultStore, ResultStore, open_backend
+from .previews import PreviewBuilder
+from .quality import QualityReport
+from .video_processor import VideoProcessor
+
+
+def execute_job(processor: VideoProcessor,
+                job: dict,
+                complexity_detectors: Optional[Dict] = None,
+                show_progress: bool = False,
+                cancel: Optional[threading.Event] = None) -> Tuple[bool, dict]:
+    """Process one job. Returns (success, record).
+
+    On failure the record holds status "failed" and the message (checkpoint
+    and preview files are removed), or is an interrupted_record() if a
+    checkpoint was left to resume from. Setting
+    cancel stops processing with status "cancelled", leaving every file to
+    whoever owns the job now.
+    """
+
+    wants_complexity = job.get("target_fps") is not None or job.get("deadline_seconds") is not None
+    if wants_complexity:
+        try:
+            check_backend(processor.pose_detector.backend.name)
+        except ValueError as e:
+            return False, {"status": "failed", "message": str(e)}
+
+    # Quality metrics and previews are collected in the same pass as rendering
+    quality_report = QualityReport()
+    preview_builder = PreviewBuilder(job["sprite_path"], job["preview_clip_path"])
+
+    checkpoint = None
+    if job.get("checkpoint_path"):
+        checkpoint = Checkpoint(job["checkpoint_path"], interval=job.get("checkpoint_interval", 300))
+        checkpoint.save_job(job)
+
+    complexity_controller = None
+    if wants_complexity:
+        # The deadline runs from acceptance, so queueing time counts too
+        waited_seconds = max(time.time() - job["accepted_at"], 0.0) if job.get("accepted_at") else 0.0
+        complexity_controller = ComplexityController(
+            target_fps=job.get("target_fps"),
+            deadline_seconds=job.get("deadline_seconds"),
+            detectors=complexity_detectors,
+            waited_seconds=waited_seconds
+        )
+
+    try:
+        success, message = processor.process_video(
+            job["input_path"],
+            job["output_path"],
+            show_progress=show_progress,
+            start=job["start_frame"],
+            end=job["end_frame"],
+            unit="frames",
+            frame_step=job["frame_step"],
+            quality_report=quality_report,
+            complexity_controller=complexity_controller,
+            preview_builder=preview_builder,
+            checkpoint=checkpoint,
+            cancel=cancel
+        )
+    finally:
+        if complexity_controller is not None:
+            complexity_controller.cleanup()
+
+    if not success:
+        if cancel is not None and cancel.is_set():
+            return False, {"status": "cancelled", "message": message}
+        if checkpoint is not None and checkpoint.exists():
+            return False, interrupted_record(job, message)
+        # Nothing to resume from, so partial previews and segments are litter
+        if checkpoint is not None:
+            checkpoint.clear()
+        preview_builder.discard()
+        return False, {"status": "failed", "message": message}
+
+    # Persist so offline tools (analyze_accuracy.py) can read it later
+    quality_report.save(job["quality_path"])
+
+    return True, {
+        "original_filename": job["original_filename"],
+        "input_path": job["input_path"],
+        "output_path": job["output_path"],
+        "quality_path": job["quality_path"],
+        "sprite_path": job["sprite_path"],
+        "preview_clip_path": job["preview_clip_path"],
+        "status": "completed",
+        "message": message,
+        "video_info": job["video_info"],
+        "range": {
+            "start_frame": job["start_frame"],
+            "end_frame": job["end_frame"],
+            "frame_step": job["frame_step"]
+        },
+        "quality": quality_report.to_dict(),
+        "complexity": complexity_controller.to_dict() if complexity_controller else None,
+        "preview": preview_builder.to_dict()
+    }
+
+
+def interrupted_record(job: dict, message: str) -> dict:
+    """Record for a job that stopped part way, keeping what's needed to resume it."""
+
+    checkpoint = Checkpoint(job["checkpoint_path"])
+    return {
+        "original_filename": job["original_filename"],
+        "input_path": job["input_path"],
+        "output_path": job["output_path"],
+        "quality_path": job["quality_path"],
+        "sprite_path": job["sprite_path"],
+        "preview_clip_path": job["preview_clip_path"],
+        "checkpoint_path": job["checkpoint_path"],
+        "status": "interrupted",
+        "message": message,
+        "video_info": job["video_info"],
+        "checkpoint": checkpoint.load_state(),
+        "job": job
+    }
+
+
+class LocalExecutor:
+    """Runs jobs in the calling process and keeps records in `store`."""
+
+    def __init__(self,
+                 processor: VideoProcessor,
+                 store: Optional[ResultStore] = None,
+                 complexity_detectors: Optional[Dict] = None):
+        self.processor = processor
+        self.store = store or MemoryResultStore()
+        self.complexity_detectors = complexity_detectors
+
+    def run(self, job: dict, priority: int = 0) -> Tuple[bool, dict]:
+        """Process job and store its record. Blocks until done."""
+
+        success, record = execute_job(self.processor, job, self.complexity_detectors, show_progress=True)
+        if success or record["status"] == "interrupted":
+            self.store.put(job["video_id"], record)
+        return success, record
+
+
+class QueueExecutor:
+    """Hands jobs to worker processes (src/worker.py) through a JobQueue.
+
+    run() blocks until a worker finishes, so the API's admission control
+    still bounds how much work each node puts on the queue. If the timeout
+    runs out first, a job still queued is cancelled; one a worker already
+    holds comes back with status "running" and keeps going.
+    """
+
+    def __init__(self,
+                 queue: JobQueue,
+                 store: ResultStore,
+                 timeout: Optional[float] = None,
+                 poll_interval: float = 0.5):
+        self.queue = queue
+        self.store = store
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def run(self, job: dict, priority: int = 0) -> Tuple[bool, dict]:
+        """Enqueue job and wait for a worker to store its record."""
+
+        self.queue.enqueue(job["video_id"], job, priority)
+        state, error = self.queue.wait(job["video_id"], self.timeout, self.poll_interval)
+
+        current = self.queue.state(job["video_id"])
+        if current is not None and current[0] in ("queued", "running"):
+            # Timed out. Cancel it so no worker starts it after the caller
+            # has given up; if one got there first, let it finish
+            if not self.queue.cancel(job["video_id"], error):
+                current = self.queue.state(job["video_id"])
+                state = current[0] if current else state
+                if state == "running":
+                    return False, {"status": "running", "message": f"{error}; a worker is still processing it"}
+
+        record = self.store.get(job["video_id"])
+        if state == "done" and record is not None:
+            return True, record
+        if record is not None and record["status"] == "interrupted":
+            return False, record
+        return False, {"status": "failed", "message": error or "Worker stored no result"}
+
+
+def create_executor(backend: str,
+                    processor: Optional[VideoProcessor] = None,
+                    complexity_detectors: Optional[Dict] = None,
+                    timeout: Optional[float] = None):
+    """Executor for a JOB_BACKEND setting: "local", or a queue URL such as
+    sqlite:///data/jobs.db that src/worker.py processes point at too."""
+
+    if backend == "local":
+        return LocalExecutor(processor, complexity_detectors=complexity_detectors)
+
+    queue, store = open_backend(backend)
+    return QueueExecutor(queue, store, timeout=timeout)
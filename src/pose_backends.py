@@ -0,0 +1,333 @@
+"""
+Pose inference backends used by PoseDetector.
+
+Every backend takes RGB frames and returns MediaPipe NormalizedLandmarkList
+results (or None), so drawing, quality metrics and checkpoints work the
+same whichever one runs inference:
+
+- 'solutions': the legacy mp.solutions.pose.Pose graph (default)
+- 'tasks': MediaPipe Tasks PoseLandmarker in VIDEO mode, needs a .task model
+- 'onnx': a BlazePose landmark model on ONNX Runtime CPU, with batched
+  inference and explicit thread settings
+"""
+
+import math
+import cv2
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
+
+try:
+    import onnxruntime as ort
+except ImportError:  # ONNX Runtime is optional, only needed for the 'onnx' backend
+    ort = None
+
+
+POSE_BACKENDS = ('solutions', 'tasks', 'onnx')
+
+# BlazePose landmark models output 33 body landmarks plus 6 auxiliary ones,
+# each as x, y, z, visibility, presence
+BLAZEPOSE_LANDMARKS = 33
+BLAZEPOSE_OUTPUT_LANDMARKS = 39
+
+# Timestamp step used when the caller doesn't know frame times
+DEFAULT_FRAME_MS = 1000.0 / 30
+
+
+class PoseBackend(ABC):
+    """One pose inference engine. Frames are RGB uint8 arrays."""
+
+    name = ''
+
+    # Frames per inference call; callers may hand process_batch() this many
+    batch_size = 1
+
+    @abstractmethod
+    def process(self, rgb_frame: np.ndarray, timestamp_ms: Optional[float] = None) -> Optional[any]:
+        """Landmarks for one frame, or None if no pose was found."""
+
+    def process_batch(self,
+                      rgb_frames: Sequence[np.ndarray],
+                      timestamps_ms: Optional[Sequence[Optional[float]]] = None) -> List[Optional[any]]:
+        """Landmarks for consecutive frames. Backends without batching loop."""
+
+        timestamps_ms = timestamps_ms or [None] * len(rgb_frames)
+        return [self.process(frame, timestamp) for frame, timestamp in zip(rgb_frames, timestamps_ms)]
+
+    def close(self):
+        pass
+
+
+class SolutionsBackend(PoseBackend):
+    """The mp.solutions.pose.Pose graph: one frame per call, tracking between frames."""
+
+    name = 'solutions'
+
+    def __init__(self,
+                 model_complexity: int = 1,
+                 min_detection_confidence: float = 0.5,
+                 min_tracking_confidence: float = 0.5,
+                 smooth_landmarks: bool = True):
+
+        # static_image_mode=False optimizes for video (tracks across frames)
+        # model_complexity: 0 fastest, 1 balances speed vs accuracy, 2 most accurate
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            smooth_landmarks=smooth_landmarks,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+    def process(self, rgb_frame: np.ndarray, timestamp_ms: Optional[float] = None) -> Optional[any]:
+        results = self.pose.process(rgb_frame)
+        return results.pose_landmarks if results else None
+
+    def close(self):
+        self.pose.close()
+
+
+class TasksBackend(PoseBackend):
+    """MediaPipe Tasks PoseLandmarker in VIDEO running mode.
+
+    VIDEO mode tracks across frames using the timestamps passed in, which
+    must increase. Timestamps that go backwards (a new video through the
+    same detector) are shifted so the landmarker sees a continuous stream.
+    """
+
+    name = 'tasks'
+
+    def __init__(self,
+                 model_path: Optional[str] = None,
+                 min_detection_confidence: float = 0.5,
+                 min_tracking_confidence: float = 0.5,
+                 min_presence_confidence: float = 0.5):
+
+        if not model_path:
+            raise ValueError("The 'tasks' pose backend needs model_path "
+                             "(a pose_landmarker_{lite,full,heavy}.task file)")
+
+        vision = mp.tasks.vision
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=1,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_pose_presence_confidence=min_presence_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+        self._offset_ms = 0
+        self._last_input_ms: Optional[float] = None
+        self._last_sent_ms = -1
+
+    def _next_timestamp(self, timestamp_ms: Optional[float]) -> int:
+        if timestamp_ms is None:
+            timestamp_ms = (self._last_input_ms or 0.0) + DEFAULT_FRAME_MS
+        elif self._last_input_ms is not None and timestamp_ms <= self._last_input_ms:
+            # Stream restarted, continue after the last timestamp we sent
+            self._offset_ms = self._last_sent_ms + DEFAULT_FRAME_MS - timestamp_ms
+
+        self._last_input_ms = timestamp_ms
+        sent = max(int(round(timestamp_ms + self._offset_ms)), self._last_sent_ms + 1)
+        self._last_sent_ms = sent
+        return sent
+
+    def process(self, rgb_frame: np.ndarray, timestamp_ms: Optional[float] = None) -> Optional[any]:
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb_frame))
+        result = self.landmarker.detect_for_video(image, self._next_timestamp(timestamp_ms))
+
+        if not result.pose_landmarks:
+            return None
+
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        for lm in result.pose_landmarks[0]:
+            landmarks.landmark.add(x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility or 0.0)
+        return landmarks
+
+    def close(self):
+        self.landmarker.close()
+
+
+def letterbox(rgb_frame: np.ndarray, size: int) -> Tuple[np.ndarray, Tuple[float, int, int]]:
+    """Scale a frame to fit a size x size square, padding the rest with black.
+
+    Returns the float32 [0, 1] square and (scale, pad_x, pad_y) to map
+    model coordinates back to the frame.
+    """
+
+    height, width = rgb_frame.shape[:2]
+    scale = size / max(width, height)
+    scaled_width = max(1, int(round(width * scale)))
+    scaled_height = max(1, int(round(height * scale)))
+    pad_x = (size - scaled_width) // 2
+    pad_y = (size - scaled_height) // 2
+
+    square = np.zeros((size, size, 3), dtype=np.float32)
+    resized = cv2.resize(rgb_frame, (scaled_width, scaled_height), interpolation=cv2.INTER_AREA)
+    square[pad_y:pad_y + scaled_height, pad_x:pad_x + scaled_width] = resized * (1.0 / 255.0)
+    return square, (scale, pad_x, pad_y)
+
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-values))
+
+
+def decode_blazepose(raw: np.ndarray,
+                     transform: Tuple[float, int, int],
+                     frame_size: Tuple[int, int]) -> any:
+    """Turn one BlazePose landmark output (39 x 5 values, in model input
+    pixels) into a NormalizedLandmarkList relative to the original frame."""
+
+    scale, pad_x, pad_y = transform
+    width, height = frame_size
+    values = np.asarray(raw, dtype=np.float32).reshape(BLAZEPOSE_OUTPUT_LANDMARKS, 5)[:BLAZEPOSE_LANDMARKS]
+
+    x = (values[:, 0] - pad_x) / (width * scale)
+    y = (values[:, 1] - pad_y) / (height * scale)
+    # z shares x's scale in BlazePose
+    z = values[:, 2] / (width * scale)
+    visibility = _sigmoid(values[:, 3])
+
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for row in zip(x.tolist(), y.tolist(), z.tolist(), visibility.tolist()):
+        landmarks.landmark.add(x=row[0], y=row[1], z=row[2], visibility=row[3])
+    return landmarks
+
+
+class OnnxBackend(PoseBackend):
+    """BlazePose landmark model on ONNX Runtime's CPU provider.
+
+    Expects a landmark model exported from MediaPipe's pose_landmark_*.tflite
+    (e.g. with tf2onnx): input NHWC (or NCHW) RGB in [0, 1], outputs the
+    (N, 195) landmarks and an (N, 1) pose presence score. Frames are
+    letterboxed whole rather than cropped to the previous frame's pose, so
+    frames within a batch don't depend on each other; this works best when
+    the dancer fills much of the frame.
+
+    intra_op_threads=0 lets ONNX Runtime use one thread per physical core.
+    batch_size > 1 needs a model exported with a dynamic batch dimension.
+    """
+
+    name = 'onnx'
+
+    def __init__(self,
+                 model_path: Optional[str] = None,
+                 batch_size: int = 1,
+                 intra_op_threads: int = 0,
+                 inter_op_threads: int = 1,
+                 min_detection_confidence: float = 0.5,
+                 score_is_logit: bool = False):
+
+        if ort is None:
+            raise ImportError("The 'onnx' pose backend requires ONNX Runtime (pip install onnxruntime)")
+        if not model_path:
+            raise ValueError("The 'onnx' pose backend needs model_path (a BlazePose landmark .onnx file)")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        shape = model_input.shape
+        self._channels_first = shape[1] == 3
+        self.input_size = int(shape[2] if self._channels_first else shape[1])
+
+        # A fixed batch dimension of 1 means the model can't batch
+        fixed_batch = shape[0] if isinstance(shape[0], int) else None
+        self.batch_size = min(batch_size, fixed_batch) if fixed_batch else batch_size
+
+        self._landmarks_output, self._score_output = self._find_outputs()
+        self.min_detection_confidence = min_detection_confidence
+        self.score_is_logit = score_is_logit
+
+    def _find_outputs(self) -> Tuple[str, Optional[str]]:
+        landmarks_output = score_output = None
+        for output in self.session.get_outputs():
+            size = math.prod(d for d in output.shape[1:] if isinstance(d, int))
+            if size == BLAZEPOSE_OUTPUT_LANDMARKS * 5 and landmarks_output is None:
+                landmarks_output = output.name
+            elif size == 1 and score_output is None:
+                score_output = output.name
+        if landmarks_output is None:
+            raise ValueError("ONNX model has no BlazePose landmark output (195 values per frame)")
+        return landmarks_output, score_output
+
+    def process(self, rgb_frame: np.ndarray, timestamp_ms: Optional[float] = None) -> Optional[any]:
+        return self.process_batch([rgb_frame])[0]
+
+    def process_batch(self,
+                      rgb_frames: Sequence[np.ndarray],
+                      timestamps_ms: Optional[Sequence[Optional[float]]] = None) -> List[Optional[any]]:
+        results: List[Optional[any]] = []
+        for first in range(0, len(rgb_frames), self.batch_size):
+            results.extend(self._run(rgb_frames[first:first + self.batch_size]))
+        return results
+
+    def _run(self, rgb_frames: Sequence[np.ndarray]) -> List[Optional[any]]:
+        squares, transforms = zip(*(letterbox(frame, self.input_size) for frame in rgb_frames))
+        batch = np.stack(squares)
+        if self._channels_first:
+            batch = batch.transpose(0, 3, 1, 2)
+
+        output_names = [self._landmarks_output] + ([self._score_output] if self._score_output else [])
+        outputs = self.session.run(output_names, {self._input_name: batch})
+        raw_landmarks = outputs[0].reshape(len(rgb_frames), -1)
+
+        if self._score_output:
+            scores = outputs[1].reshape(len(rgb_frames))
+            if self.score_is_logit:
+                scores = _sigmoid(scores)
+        else:
+            scores = np.ones(len(rgb_frames), dtype=np.float32)
+
+        results = []
+        for frame, raw, transform, score in zip(rgb_frames, raw_landmarks, transforms, scores):
+            if score < self.min_detection_confidence:
+                results.append(None)
+                continue
+            height, width = frame.shape[:2]
+            results.append(decode_blazepose(raw, transform, (width, height)))
+        return results
+
+
+def backend_options(name: str,
+                    model_path: Optional[str] = None,
+                    batch_size: int = 1,
+                    threads: int = 0) -> dict:
+    """backend_options for PoseDetector from flat CLI/env settings,
+    keeping only the ones the named backend takes."""
+
+    if name == 'tasks':
+        return {'model_path': model_path}
+    if name == 'onnx':
+        return {'model_path': model_path, 'batch_size': batch_size, 'intra_op_threads': threads}
+    return {}
+
+
+def create_backend(name: str = 'solutions',
+                   model_complexity: int = 1,
+                   min_detection_confidence: float = 0.5,
+                   min_tracking_confidence: float = 0.5,
+                   **options) -> PoseBackend:
+    """Create a backend by name. options go to the backend (model_path,
+    batch_size, intra_op_threads, ...)."""
+
+    if name == 'solutions':
+        return SolutionsBackend(model_complexity, min_detection_confidence, min_tracking_confidence, **options)
+    if name == 'tasks':
+        return TasksBackend(min_detection_confidence=min_detection_confidence,
+                            min_tracking_confidence=min_tracking_confidence, **options)
+    if name == 'onnx':
+        return OnnxBackend(min_detection_confidence=min_detection_confidence, **options)
+    raise ValueError(f"Unknown pose backend '{name}', expected one of {POSE_BACKENDS}")
@@ -7,36 +7,68 @@ import mediapipe as mp
 import numpy as np
 from typing import Optional, Tuple, List
 
+from .pose_backends import create_backend
+
 
 class PoseDetector:
-    """Detects human pose keypoints and draws skeleton overlay."""
+    """Detects human pose keypoints and draws skeleton overlay.
+    
+    Inference runs on a pluggable backend (see pose_backends): 'solutions'
+    (default), 'tasks' or 'onnx'. backend_options go to the backend, e.g.
+    model_path, batch_size or intra_op_threads.
+    """
     
     def __init__(self, 
                  min_detection_confidence: float = 0.5,
-                 min_tracking_confidence: float = 0.5):
+                 min_tracking_confidence: float = 0.5,
+                 model_complexity: int = 1,
+                 backend: str = 'solutions',
+                 backend_options: Optional[dict] = None):
         
+        self.model_complexity = model_complexity
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        # static_image_mode=False optimizes for video (tracks across frames)
-        # model_complexity=1 balances speed vs accuracy
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
+        self.backend = create_backend(
+            backend,
+            model_complexity=model_complexity,
             min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
+            min_tracking_confidence=min_tracking_confidence,
+            **(backend_options or {})
         )
+        # The underlying mp.solutions Pose graph, as before backends existed;
+        # None for the other backends
+        self.pose = getattr(self.backend, 'pose', None)
+    
+    @property
+    def batch_size(self) -> int:
+        """Frames the backend can take per detect_batch call."""
+        return self.backend.batch_size
+    
+    def detect_pose(self,
+                    frame: np.ndarray,
+                    is_rgb: bool = False,
+                    timestamp_ms: Optional[float] = None) -> Optional[any]:
+        """Detect pose landmarks in a frame. Returns None if no pose found.
         
-    def detect_pose(self, frame: np.ndarray) -> Optional[any]:
-        """Detect pose landmarks in a frame. Returns None if no pose found."""
+        Frames are BGR (OpenCV order) unless is_rgb is set, in which case
+        they're passed to the backend without conversion. timestamp_ms is
+        the frame's time in the video (used by the 'tasks' backend).
+        """
         
         # Convert BGR to RGB (MediaPipe requirement)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_frame)
+        rgb_frame = frame if is_rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self.backend.process(rgb_frame, timestamp_ms)
+    
+    def detect_batch(self,
+                     frames: List[np.ndarray],
+                     is_rgb: bool = False,
+                     timestamps_ms: Optional[List[Optional[float]]] = None) -> List[Optional[any]]:
+        """detect_pose for consecutive frames, in one inference call where the backend supports it."""
         
-        return results.pose_landmarks if results else None
+        rgb_frames = frames if is_rgb else [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        return self.backend.process_batch(rgb_frames, timestamps_ms)
     
     def draw_skeleton(self, frame: np.ndarray, landmarks: any) -> np.ndarray:
         """Draw skeleton overlay on frame. Returns unmodified frame if no landmarks."""
@@ -72,4 +104,4 @@ class PoseDetector:
         return keypoints
     
     def cleanup(self):
-        self.pose.close()
+        self.backend.close()
@@ -0,0 +1,151 @@
+"""
+Lightweight preview artifacts built during video processing.
+"""
+
+import cv2
+import math
+import os
+import numpy as np
+from typing import List, Optional
+
+
+class PreviewBuilder:
+    """Collects a thumbnail sprite sheet and a short preview clip.
+
+    Fed the rendered (skeleton) frames by VideoProcessor.process_video, so
+    previews cost a resize per sampled frame rather than a second decode.
+    The sprite sheet holds one thumbnail every thumbnail_interval seconds
+    (spaced further apart if that would exceed max_thumbnails). The clip is
+    a small, low frame rate time-lapse of the whole span, at most
+    clip_max_seconds long.
+    """
+
+    def __init__(self,
+                 sprite_path: str,
+                 clip_path: str,
+                 thumbnail_width: int = 160,
+                 thumbnail_interval: float = 1.0,
+                 max_thumbnails: int = 100,
+                 sprite_columns: int = 10,
+                 clip_width: int = 320,
+                 clip_fps: int = 10,
+                 clip_max_seconds: float = 10.0,
+                 jpeg_quality: int = 70):
+
+        self.sprite_path = sprite_path
+        self.clip_path = clip_path
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_interval = thumbnail_interval
+        self.max_thumbnails = max_thumbnails
+        self.sprite_columns = sprite_columns
+        self.clip_width = clip_width
+        self.clip_fps = clip_fps
+        self.clip_max_seconds = clip_max_seconds
+        self.jpeg_quality = jpeg_quality
+
+        self.fps = 0.0
+        self.thumbnail_size = (0, 0)
+        self.clip_size = (0, 0)
+        self.thumbnails: List[np.ndarray] = []
+        self.thumbnail_frames: List[int] = []
+        self.clip_frames = 0
+        self._clip_writer: Optional[cv2.VideoWriter] = None
+
+    @staticmethod
+    def _scaled_size(width: int, height: int, target_width: int):
+        if width <= target_width:
+            return width - width % 2, height - height % 2
+        # Even dimensions keep video encoders happy
+        scaled_height = int(round(height * target_width / width / 2)) * 2
+        return target_width, max(scaled_height, 2)
+
+    def begin(self, fps: float, width: int, height: int, start_frame: int, span_frames: int):
+        """Plan sampling for a span of span_frames frames starting at start_frame."""
+
+        self.fps = fps
+        self.thumbnail_size = self._scaled_size(width, height, self.thumbnail_width)
+        self.clip_size = self._scaled_size(width, height, self.clip_width)
+
+        self._thumbnail_stride = max(1, int(round(self.thumbnail_interval * fps)))
+        self._clip_stride = max(1, int(round(fps / self.clip_fps)))
+
+        if span_frames > 0:
+            # Space samples out so long videos stay within the limits
+            self._thumbnail_stride = max(self._thumbnail_stride, math.ceil(span_frames / self.max_thumbnails))
+            max_clip_frames = self.clip_fps * self.clip_max_seconds
+            self._clip_stride = max(self._clip_stride, math.ceil(span_frames / max_clip_frames))
+
+        self._next_thumbnail = start_frame
+        self._next_clip_frame = start_frame
+
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self._clip_writer = cv2.VideoWriter(self.clip_path, fourcc, self.clip_fps, self.clip_size)
+
+    def add(self, frame_index: int, frame: np.ndarray):
+        """Offer a rendered BGR frame; it's kept only if due for a sample."""
+
+        if frame_index >= self._next_thumbnail and len(self.thumbnails) < self.max_thumbnails:
+            self.thumbnails.append(cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA))
+            self.thumbnail_frames.append(frame_index)
+            self._next_thumbnail = frame_index + self._thumbnail_stride
+
+        if frame_index >= self._next_clip_frame and self._clip_writer is not None:
+            self._clip_writer.write(cv2.resize(frame, self.clip_size, interpolation=cv2.INTER_AREA))
+            self.clip_frames += 1
+            self._next_clip_frame = frame_index + self._clip_stride
+
+    def finish(self) -> bool:
+        """Write the sprite sheet and close the clip. Returns False if nothing was sampled."""
+
+        self.close()
+
+        if not self.thumbnails:
+            return False
+
+        width, height = self.thumbnail_size
+        columns = min(self.sprite_columns, len(self.thumbnails))
+        rows = math.ceil(len(self.thumbnails) / columns)
+        sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+
+        for i, thumbnail in enumerate(self.thumbnails):
+            row, column = divmod(i, columns)
+            sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = thumbnail
+
+        return cv2.imwrite(self.sprite_path, sheet, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+
+    def close(self):
+        """Close the clip without writing the sprite sheet or removing anything."""
+
+        if self._clip_writer is not None:
+            self._clip_writer.release()
+            self._clip_writer = None
+
+    def discard(self):
+        """Close the clip and remove any preview files, e.g. when processing failed."""
+
+        self.close()
+        for path in (self.sprite_path, self.clip_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def to_dict(self) -> dict:
+        """Layout needed by clients to slice the sprite sheet and label frames."""
+
+        width, height = self.thumbnail_size
+        columns = min(self.sprite_columns, len(self.thumbnails)) if self.thumbnails else 0
+
+        return {
+            "sprite": {
+                "thumbnail_width": width,
+                "thumbnail_height": height,
+                "columns": columns,
+                "rows": math.ceil(len(self.thumbnails) / columns) if columns else 0,
+                "frames": self.thumbnail_frames
+            },
+            "clip": {
+                "fps": self.clip_fps,
+                "frames": self.clip_frames,
+                "width": self.clip_size[0],
+                "height": self.clip_size[1]
+            }
+        }
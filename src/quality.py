@@ -0,0 +1,120 @@
+"""
+Pose detection quality metrics collected during video processing.
+"""
+
+import json
+import mediapipe as mp
+import numpy as np
+from typing import Optional, List
+
+
+LANDMARK_NAMES = [landmark.name.lower() for landmark in mp.solutions.pose.PoseLandmark]
+
+
+class QualityReport:
+    """Accumulates detection quality metrics one frame at a time.
+
+    Passed to VideoProcessor.process_video so metrics come from the same
+    inference pass that renders the skeleton, rather than a second decode.
+    """
+
+    def __init__(self,
+                 visibility_threshold: float = 0.5,
+                 histogram_bins: int = 10):
+
+        self.visibility_threshold = visibility_threshold
+        self.histogram_bins = histogram_bins
+        self.fps = 0.0
+
+        self.frames_processed = 0
+        self.frames_detected = 0
+        self.confidence_sum = 0.0
+        self.visible_keypoints_sum = 0
+        self.min_visible_keypoints: Optional[int] = None
+
+        # Rows are landmarks, columns are visibility bins over [0, 1]
+        self.visibility_histograms = np.zeros((len(LANDMARK_NAMES), histogram_bins), dtype=np.int64)
+
+        self.dropout_segments: List[List[int]] = []
+        self._dropout_start: Optional[int] = None
+        self._last_frame_index: Optional[int] = None
+
+    def update(self, frame_index: int, landmarks: any):
+        """Record the detection result for one processed frame."""
+
+        self.frames_processed += 1
+
+        if landmarks is None:
+            if self._dropout_start is None:
+                self._dropout_start = frame_index
+            self._last_frame_index = frame_index
+            return
+
+        self._close_dropout()
+        self._last_frame_index = frame_index
+        self.frames_detected += 1
+
+        visibility = np.clip([lm.visibility for lm in landmarks.landmark], 0.0, 1.0)
+        visible = int(np.count_nonzero(visibility > self.visibility_threshold))
+
+        self.confidence_sum += float(visibility.mean())
+        self.visible_keypoints_sum += visible
+        if self.min_visible_keypoints is None or visible < self.min_visible_keypoints:
+            self.min_visible_keypoints = visible
+
+        bins = np.minimum((visibility * self.histogram_bins).astype(int), self.histogram_bins - 1)
+        self.visibility_histograms[np.arange(len(bins)), bins] += 1
+
+    def finish(self, fps: float):
+        """Close any open dropout segment. Call once processing has stopped."""
+
+        self.fps = fps
+        self._close_dropout()
+
+    def _close_dropout(self):
+        if self._dropout_start is not None:
+            self.dropout_segments.append([self._dropout_start, self._last_frame_index])
+            self._dropout_start = None
+
+    def to_dict(self) -> dict:
+        """Summarize metrics as a JSON-serializable dict."""
+
+        detected = self.frames_detected
+
+        return {
+            "frames_processed": self.frames_processed,
+            "frames_detected": detected,
+            "detection_rate": (detected / self.frames_processed * 100) if self.frames_processed else 0.0,
+            "average_confidence": (self.confidence_sum / detected) if detected else 0.0,
+            "average_visible_keypoints": (self.visible_keypoints_sum / detected) if detected else 0.0,
+            "min_visible_keypoints": self.min_visible_keypoints or 0,
+            "total_keypoints": len(LANDMARK_NAMES),
+            "visibility_threshold": self.visibility_threshold,
+            "landmark_visibility": {
+                "bin_edges": np.linspace(0.0, 1.0, self.histogram_bins + 1).round(3).tolist(),
+                "histograms": {
+                    name: self.visibility_histograms[i].tolist()
+                    for i, name in enumerate(LANDMARK_NAMES)
+                }
+            },
+            "dropout_segments": [
+                {
+                    "start_frame": start,
+                    "end_frame": end,
+                    "start_seconds": round(start / self.fps, 3) if self.fps else None,
+                    "end_seconds": round(end / self.fps, 3) if self.fps else None
+                }
+                for start, end in self.dropout_segments
+            ]
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @staticmethod
+    def load(path: str) -> dict:
+        """Read a report previously written by save()."""
+
+        with open(path) as f:
+            return json.load(f)
@@ -3,103 +3,348 @@ Video processing that applies pose detection frame-by-frame.
 """
 
 import cv2
+import math
 import os
+import threading
 from typing import Tuple, Optional
 from .pose_detector import PoseDetector
+from .quality import QualityReport
+from .complexity import ComplexityController
+from .previews import PreviewBuilder
+from .checkpoint import Checkpoint, landmarks_to_array
+from .decoders import DECODE_BACKENDS, open_decoder, av
 
 
 class VideoProcessor:
     """Processes videos to add pose skeleton overlay."""
     
-    def __init__(self, pose_detector: Optional[PoseDetector] = None):
+    def __init__(self,
+                 pose_detector: Optional[PoseDetector] = None,
+                 decode_backend: str = 'opencv',
+                 decode_options: Optional[dict] = None):
+        """decode_backend is 'opencv' or 'pyav'; decode_options go to the decoder
+        (for pyav: thread_count, max_width, pool_size)."""
+        
+        if decode_backend not in DECODE_BACKENDS:
+            raise ValueError(f"Unknown decode backend '{decode_backend}', expected one of {DECODE_BACKENDS}")
+        if decode_backend == 'pyav' and av is None:
+            raise ImportError("The 'pyav' decode backend requires PyAV (pip install av)")
+        
         self.pose_detector = pose_detector or PoseDetector()
+        self.decode_backend = decode_backend
+        self.decode_options = decode_options or {}
         
     def process_video(self, 
                      input_path: str, 
                      output_path: str,
-                     show_progress: bool = False) -> Tuple[bool, str]:
-        """Process video and add skeleton overlay. Returns (success, message)."""
+                     show_progress: bool = False,
+                     start: Optional[float] = None,
+                     end: Optional[float] = None,
+                     unit: str = 'seconds',
+                     frame_step: int = 1,
+                     quality_report: Optional[QualityReport] = None,
+                     complexity_controller: Optional[ComplexityController] = None,
+                     preview_builder: Optional[PreviewBuilder] = None,
+                     checkpoint: Optional[Checkpoint] = None,
+                     cancel: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Process video and add skeleton overlay. Returns (success, message).
+        
+        start/end restrict processing to a span of the video, in seconds or
+        frames depending on unit. With frame_step > 1 only every Nth frame of
+        the span is decoded and written; the rest are grabbed and discarded.
+        If quality_report is given it is updated with every processed frame.
+        If complexity_controller is given it picks the detector for each frame
+        instead of self.pose_detector, trading accuracy for speed as needed.
+        If preview_builder is given it samples rendered frames for previews.
+        If checkpoint is given, progress is saved as it goes and a rerun with
+        the same arguments resumes from the last checkpoint.
+        If cancel is given and gets set, processing stops before the next
+        batch and nothing more is written: output, checkpoint and previews
+        are left as they are (e.g. for a worker that lost its job's lease).
+        """
         
         if not os.path.exists(input_path):
             return False, f"Input video not found: {input_path}"
         
-        cap = cv2.VideoCapture(input_path)
-        if not cap.isOpened():
+        if frame_step < 1:
+            return False, f"frame_step must be at least 1, got {frame_step}"
+        
+        decoder = open_decoder(input_path, self.decode_backend, **self.decode_options)
+        if not decoder.is_opened():
+            decoder.release()
             return False, "Failed to open input video"
         
         # Get video properties from input
-        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_width = decoder.width
+        frame_height = decoder.height
+        fps = decoder.fps
+        total_frames = decoder.frame_count
+        
+        try:
+            start_frame, end_frame = self.resolve_frame_range(start, end, unit, fps, total_frames)
+        except ValueError as e:
+            decoder.release()
+            return False, str(e)
+        
+        # Keep playback speed of the sampled output real-time
+        output_fps = fps / frame_step
+        
+        resume_frame = start_frame
+        frame_count = 0
+        frames_with_pose = 0
+        writer_path = output_path
+        
+        if checkpoint is not None:
+            checkpoint.load({
+                "input_path": os.path.abspath(input_path),
+                "start_frame": start_frame,
+                "end_frame": end_frame,
+                "frame_step": frame_step,
+                "width": frame_width,
+                "height": frame_height
+            })
+            if checkpoint.resumed:
+                resume_frame = checkpoint.next_frame
+                frame_count = checkpoint.frames_done
+                frames_with_pose = checkpoint.frames_with_pose
+            # Frames go into checkpointed segments, joined at the end
+            writer_path = checkpoint.segment_path()
+            segment_frames = []
+            segment_landmarks = []
         
         # Create output video writer
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (frame_width, frame_height))
+        out = cv2.VideoWriter(writer_path, fourcc, output_fps, (frame_width, frame_height))
         
         if not out.isOpened():
-            cap.release()
+            decoder.release()
             return False, "Failed to create output video"
         
-        frame_count = 0
-        frames_with_pose = 0
+        span_frames = (end_frame - start_frame) if end_frame is not None else total_frames - start_frame
+        
+        # After a resume, start a few sampled frames early so the detector's
+        # tracking is warmed up again by the time output resumes
+        seek_frame = start_frame
+        if resume_frame > start_frame:
+            warmup_start = resume_frame - checkpoint.warmup_frames * frame_step
+            seek_frame = max(start_frame, warmup_start - (warmup_start - start_frame) % frame_step)
+        
+        frame_index = decoder.seek(seek_frame) if seek_frame > 0 else 0
+        detector = self.pose_detector
+        
+        # RGB decoders feed MediaPipe directly, but drawn and written frames
+        # still need a conversion back to BGR (into one reused buffer)
+        decodes_rgb = decoder.color == 'rgb'
+        bgr_buffer = None
+        
+        if complexity_controller is not None:
+            remaining_frames = span_frames - (resume_frame - start_frame)
+            frames_to_process = math.ceil(remaining_frames / frame_step) if remaining_frames > 0 else None
+            complexity_controller.begin(frames_to_process, first_frame=resume_frame)
+        
+        if preview_builder is not None:
+            preview_builder.begin(fps, frame_width, frame_height, start_frame, span_frames)
+        
+        if checkpoint is not None and checkpoint.resumed:
+            # Quality and previews for already-finished frames come from the
+            # checkpoint instead of being recomputed
+            checkpoint.replay(quality_report, preview_builder)
+        
+        # Batched backends get several sampled frames per inference call.
+        # Pooled decoder buffers are reused after a few reads, so batched
+        # frames are copied
+        batch_size = max(1, getattr(self.pose_detector, 'batch_size', 1))
+        stream_ended = False
+        cancelled = False
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
+            while not stream_ended:
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
                     break
                 
-                landmarks = self.pose_detector.detect_pose(frame)
+                batch = []
+                while len(batch) < batch_size and (end_frame is None or frame_index < end_frame):
+                    # Skipped frames are grabbed but never converted to pixels
+                    if (frame_index - start_frame) % frame_step:
+                        if not decoder.grab():
+                            stream_ended = True
+                            break
+                        frame_index += 1
+                        continue
+                    
+                    ret, frame = decoder.read()
+                    if not ret:
+                        stream_ended = True
+                        break
+                    # The decoder's presentation time, not index / fps, which
+                    # drifts on variable-frame-rate phone recordings
+                    timestamp_ms = decoder.timestamp * 1000.0
+                    batch.append((frame_index, frame.copy() if batch_size > 1 else frame, timestamp_ms))
+                    frame_index += 1
                 
-                if landmarks:
-                    frame = self.pose_detector.draw_skeleton(frame, landmarks)
-                    frames_with_pose += 1
+                if not batch:
+                    break
+                
+                if complexity_controller is not None:
+                    detector = complexity_controller.detector
                 
-                out.write(frame)
-                frame_count += 1
+                if len(batch) == 1:
+                    batch_landmarks = [detector.detect_pose(batch[0][1], is_rgb=decodes_rgb,
+                                                            timestamp_ms=batch[0][2])]
+                else:
+                    batch_landmarks = detector.detect_batch([frame for _, frame, _ in batch], is_rgb=decodes_rgb,
+                                                            timestamps_ms=[t for _, _, t in batch])
                 
-                # Show progress every 30 frames (~1 second at 30fps)
-                if show_progress and frame_count % 30 == 0:
-                    progress = (frame_count / total_frames) * 100
-                    print(f"Processing: {progress:.1f}% ({frame_count}/{total_frames} frames)")
+                for (index, frame, _), landmarks in zip(batch, batch_landmarks):
+                    if index < resume_frame:
+                        # Warm-up frame, already in a committed segment
+                        continue
+                    
+                    if decodes_rgb:
+                        bgr_buffer = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=bgr_buffer)
+                        frame = bgr_buffer
+                    
+                    if quality_report is not None:
+                        quality_report.update(index, landmarks)
+                    
+                    if landmarks:
+                        frame = detector.draw_skeleton(frame, landmarks)
+                        frames_with_pose += 1
+                    
+                    out.write(frame)
+                    frame_count += 1
+                    
+                    if preview_builder is not None:
+                        preview_builder.add(index, frame)
+                    
+                    if checkpoint is not None:
+                        segment_frames.append(index)
+                        segment_landmarks.append(landmarks_to_array(landmarks))
+                        if len(segment_frames) >= checkpoint.interval:
+                            out.release()
+                            checkpoint.commit_segment(segment_frames, segment_landmarks, index + 1)
+                            segment_frames = []
+                            segment_landmarks = []
+                            out = cv2.VideoWriter(checkpoint.segment_path(), fourcc, output_fps,
+                                                  (frame_width, frame_height))
+                    
+                    if complexity_controller is not None:
+                        complexity_controller.update(index)
+                    
+                    # Show progress every 30 frames (~1 second at 30fps)
+                    if show_progress and frame_count % 30 == 0 and span_frames > 0:
+                        progress = ((index + 1 - start_frame) / span_frames) * 100
+                        print(f"Processing: {progress:.1f}% ({index + 1 - start_frame}/{span_frames} frames)")
         
         except Exception as e:
-            cap.release()
+            decoder.release()
             out.release()
+            # No previews of a video that was never finished
+            if preview_builder is not None:
+                preview_builder.discard()
             return False, f"Error during processing: {str(e)}"
         
         finally:
-            cap.release()
+            decoder.release()
             out.release()
         
+        if cancelled:
+            if preview_builder is not None:
+                preview_builder.close()
+            return False, "Processing cancelled"
+        
+        if checkpoint is not None:
+            if segment_frames:
+                checkpoint.commit_segment(segment_frames, segment_landmarks, frame_index)
+            if not checkpoint.concatenate(output_path, output_fps, (frame_width, frame_height)):
+                if preview_builder is not None:
+                    preview_builder.discard()
+                return False, "Failed to create output video"
+            checkpoint.clear()
+        
+        if preview_builder is not None:
+            preview_builder.finish()
+        
+        if quality_report is not None:
+            quality_report.finish(fps)
+        
+        if complexity_controller is not None:
+            complexity_controller.finish()
+        
         detection_rate = (frames_with_pose / frame_count * 100) if frame_count > 0 else 0
         
         success_msg = (f"Video processed successfully. "
                       f"Processed {frame_count} frames. "
                       f"Pose detected in {frames_with_pose} frames ({detection_rate:.1f}%).")
         
+        if start_frame > 0 or end_frame != total_frames or frame_step > 1:
+            success_msg += f" Range: frames {start_frame}-{frame_index}, every {frame_step} frame(s)."
+        
+        if resume_frame > start_frame:
+            success_msg += f" Resumed from checkpoint at frame {resume_frame}."
+        
         return True, success_msg
     
+    @staticmethod
+    def resolve_frame_range(start: Optional[float],
+                            end: Optional[float],
+                            unit: str,
+                            fps: float,
+                            total_frames: int) -> Tuple[int, Optional[int]]:
+        """Convert a start/end span to (start_frame, end_frame). Raises ValueError if invalid.
+        
+        end_frame is None when the container doesn't report a frame count and
+        no end was requested, meaning "read until the stream ends".
+        """
+        
+        if unit not in ('seconds', 'frames'):
+            raise ValueError(f"Unknown range unit '{unit}', expected 'seconds' or 'frames'")
+        
+        if unit == 'seconds' and fps <= 0 and (start is not None or end is not None):
+            raise ValueError("Cannot convert seconds to frames: video reports no fps")
+        
+        def to_frame(value: float) -> int:
+            return int(round(value * fps)) if unit == 'seconds' else int(value)
+        
+        start_frame = to_frame(start) if start is not None else 0
+        end_frame = to_frame(end) if end is not None else None
+        
+        if total_frames > 0:
+            end_frame = total_frames if end_frame is None else min(end_frame, total_frames)
+        
+        if start_frame < 0:
+            raise ValueError(f"Range start must not be negative, got {start}")
+        if end_frame is not None and start_frame >= end_frame:
+            raise ValueError(f"Empty range: start {start} is not before end {end if end is not None else total_frames}")
+        
+        return start_frame, end_frame
+    
     def get_video_info(self, video_path: str) -> Optional[dict]:
-        """Get video metadata (resolution, fps, duration). Returns None on error."""
+        """Get video metadata (resolution, fps, rotation, duration). Returns None on error.
+        
+        Read through the configured decoder, so fps is exact (29.97, not 29)
+        and width/height are the size of the frames process_video will see.
+        """
         
         if not os.path.exists(video_path):
             return None
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        decoder = open_decoder(video_path, self.decode_backend, **self.decode_options)
+        if not decoder.is_opened():
+            decoder.release()
             return None
         
         info = {
-            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-            'fps': int(cap.get(cv2.CAP_PROP_FPS)),
-            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-            'duration_seconds': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / int(cap.get(cv2.CAP_PROP_FPS))
+            'width': decoder.width,
+            'height': decoder.height,
+            'fps': decoder.fps,
+            'rotation': decoder.rotation,
+            'frame_count': decoder.frame_count,
+            'duration_seconds': decoder.frame_count / decoder.fps if decoder.fps > 0 else 0
         }
         
-        cap.release()
+        decoder.release()
         return info
     
     def cleanup(self):
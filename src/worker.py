@@ -0,0 +1,207 @@
+"""
+Standalone processing worker.
+
+Start any number of these against the same job backend and storage
+directory as the API. The bundled SQLite backend keeps them all on one
+host:
+
+    python -m src.worker --backend sqlite:////var/lib/dance/jobs.db
+
+Workers on other machines need a networked backend plugged in with
+src.job_queue.register_backend().
+
+Each worker claims jobs under a lease and renews it with heartbeats while
+processing. If a worker dies its lease runs out and another worker picks
+the job up again.
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+from .complexity import shared_detectors
+from .decoders import DECODE_BACKENDS
+from .job_queue import Job, JobQueue, ResultStore, open_backend
+from .jobs import execute_job
+from .pose_backends import POSE_BACKENDS, backend_options
+from .pose_detector import PoseDetector
+from .video_processor import VideoProcessor
+
+
+class Worker:
+    """Claims jobs from a JobQueue, processes them and stores the records."""
+
+    def __init__(self,
+                 queue: JobQueue,
+                 store: ResultStore,
+                 processor: VideoProcessor,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = 60.0,
+                 heartbeat_interval: Optional[float] = None):
+
+        self.queue = queue
+        self.store = store
+        self.processor = processor
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        # Renew well before expiry so one slow heartbeat doesn't lose the job
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        # Shared across jobs so deadline-aware jobs don't reload models
+        self.complexity_detectors = shared_detectors(processor.pose_detector)
+        self.jobs_done = 0
+
+    def _heartbeat(self, job: Job, stop: threading.Event, lease_lost: threading.Event):
+        while not stop.wait(self.heartbeat_interval):
+            if not self.queue.heartbeat(job.id, self.worker_id, self.lease_seconds):
+                print(f"[{self.worker_id}] Lost lease on job {job.id}, abandoning it")
+                # Another worker may own the job now; stop writing its files
+                lease_lost.set()
+                return
+
+    def run_once(self) -> bool:
+        """Process one job if one is available. Returns False if the queue was empty."""
+
+        job = self.queue.claim(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        print(f"[{self.worker_id}] Processing job {job.id} (attempt {job.attempts})")
+
+        stop = threading.Event()
+        lease_lost = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, stop, lease_lost), daemon=True)
+        heartbeat.start()
+
+        try:
+            success, record = execute_job(self.processor, job.payload, self.complexity_detectors, cancel=lease_lost)
+        except Exception as e:
+            success, record = False, {"status": "failed", "message": f"Processing failed: {str(e)}"}
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        # Renewing the lease doubles as the ownership check: a worker whose
+        # lease ran out must not overwrite the new owner's record
+        if lease_lost.is_set() or not self.queue.heartbeat(job.id, self.worker_id, self.lease_seconds):
+            self.jobs_done += 1
+            print(f"[{self.worker_id}] Job {job.id}: lease lost, result discarded")
+            return True
+
+        if success:
+            # Record first: once the job is done the API reads the store
+            self.store.put(job.id, record)
+            self.queue.complete(job.id, self.worker_id)
+        else:
+            if record["status"] == "interrupted":
+                # Keep the checkpoint findable so the job can be resumed
+                self.store.put(job.id, record)
+            self.queue.fail(job.id, self.worker_id, record["message"])
+
+        self.jobs_done += 1
+        print(f"[{self.worker_id}] Job {job.id}: {record['message']}")
+        return True
+
+    def run(self, poll_interval: float = 1.0, max_jobs: Optional[int] = None):
+        """Keep processing jobs, sleeping poll_interval when the queue is empty."""
+
+        while max_jobs is None or self.jobs_done < max_jobs:
+            if not self.run_once():
+                time.sleep(poll_interval)
+
+    def cleanup(self):
+        self.processor.cleanup()
+        for detector in self.complexity_detectors.values():
+            if detector is not self.processor.pose_detector:
+                detector.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Process analysis jobs from a shared job queue'
+    )
+    parser.add_argument(
+        '--backend',
+        type=str,
+        default=os.getenv("JOB_BACKEND"),
+        help='Job backend URL, e.g. sqlite:////var/lib/dance/jobs.db (default: $JOB_BACKEND)'
+    )
+    parser.add_argument(
+        '--lease',
+        type=float,
+        default=60.0,
+        help='Lease length in seconds; heartbeats renew it (default: 60)'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=1.0,
+        help='Seconds to wait when the queue is empty (default: 1)'
+    )
+    parser.add_argument(
+        '--max-jobs',
+        type=int,
+        default=None,
+        help='Exit after this many jobs (default: run forever)'
+    )
+    parser.add_argument(
+        '--decoder',
+        choices=DECODE_BACKENDS,
+        default=os.getenv("DECODE_BACKEND", "opencv"),
+        help='Video decode backend (default: $DECODE_BACKEND or opencv)'
+    )
+    parser.add_argument(
+        '--pose-backend',
+        choices=POSE_BACKENDS,
+        default=os.getenv("POSE_BACKEND", "solutions"),
+        help='Pose inference backend (default: $POSE_BACKEND or solutions)'
+    )
+    parser.add_argument(
+        '--pose-model',
+        type=str,
+        default=os.getenv("POSE_MODEL_PATH"),
+        help='Model file for the tasks/onnx backends (default: $POSE_MODEL_PATH)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=int(os.getenv("POSE_BATCH_SIZE", "8")),
+        help='Frames per inference call for the onnx backend (default: 8)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=int(os.getenv("POSE_THREADS", "0")),
+        help='ONNX Runtime intra-op threads, 0 for one per core (default: 0)'
+    )
+
+    args = parser.parse_args()
+
+    if not args.backend or args.backend == "local":
+        parser.error("--backend must name a shared job queue, e.g. sqlite:////var/lib/dance/jobs.db")
+    if args.pose_backend != 'solutions' and not args.pose_model:
+        parser.error(f"--pose-backend {args.pose_backend} needs --pose-model")
+
+    queue, store = open_backend(args.backend)
+    detector = PoseDetector(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        backend=args.pose_backend,
+        backend_options=backend_options(args.pose_backend, args.pose_model, args.batch_size, args.threads)
+    )
+    worker = Worker(queue, store, VideoProcessor(detector, decode_backend=args.decoder), lease_seconds=args.lease)
+
+    print(f"Worker {worker.worker_id} polling {args.backend}")
+    try:
+        worker.run(poll_interval=args.poll_interval, max_jobs=args.max_jobs)
+    except KeyboardInterrupt:
+        print("\nStopping worker")
+    finally:
+        worker.cleanup()
+
+
+if __name__ == "__main__":
+    main()
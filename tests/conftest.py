@@ -0,0 +1,20 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+import pytest
+
+
+class FakeClock:
+    """Manually advanced clock so timing-dependent logic is deterministic"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,124 @@
+"""
+Unit tests for admission control and job scheduling.
+"""
+
+import asyncio
+import threading
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.admission import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    
+    @pytest.fixture
+    def controller(self, clock):
+        return AdmissionController(
+            max_wait_seconds=10,
+            per_client_limit=2,
+            short_clip_frames=100,
+            initial_seconds_per_frame=0.1,
+            clock=clock
+        )
+    
+    def test_lanes(self, controller):
+        assert controller.lane_for(100) == 'short'
+        assert controller.lane_for(101) == 'long'
+    
+    def test_admits_when_idle(self, controller):
+        ticket = controller.admit("a", 50)
+        assert ticket.lane == 'short'
+        assert controller.estimated_wait() == 0
+    
+    def test_rejects_when_wait_too_long(self, controller):
+        # 300 frames at 0.1s each = 30s of queued work
+        controller._running.append(controller.admit("a", 300))
+        
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.admit("b", 50)
+        
+        assert rejected.value.status_code == 503
+        assert rejected.value.retry_after == 20
+    
+    def test_wait_shrinks_as_running_job_progresses(self, controller, clock):
+        ticket = controller.admit("a", 300)
+        controller._running.append(ticket)
+        ticket.started_at = clock.now
+        clock.now += 25
+        
+        assert controller.estimated_wait() == pytest.approx(5)
+        controller.check("b")
+    
+    def test_short_lane_ignores_queued_long_jobs(self, controller):
+        controller._waiting.append(controller.admit("a", 500))
+        
+        assert controller.estimated_wait('long') == pytest.approx(50)
+        assert controller.estimated_wait('short') == 0
+        controller.admit("b", 50)
+        with pytest.raises(AdmissionRejected):
+            controller.admit("c", 200)
+    
+    def test_per_client_limit(self, controller):
+        controller.admit("a", 10)
+        controller.admit("a", 10)
+        
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.check("a")
+        
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+        controller.admit("b", 10)
+    
+    def test_short_jobs_run_before_long(self, controller):
+        order = []
+        gate = threading.Event()
+        
+        async def scenario():
+            first = controller.admit("a", 10)
+            long_job = controller.admit("b", 50)
+            long_job.lane = 'long'
+            short_job = controller.admit("c", 10)
+            
+            blocking = asyncio.create_task(controller.run(first, lambda: gate.wait(5) and order.append("first")))
+            await asyncio.sleep(0)
+            queued_long = asyncio.create_task(controller.run(long_job, lambda: order.append("long")))
+            queued_short = asyncio.create_task(controller.run(short_job, lambda: order.append("short")))
+            await asyncio.sleep(0)
+            
+            assert controller.stats()["waiting"] == {"short": 1, "long": 1}
+            gate.set()
+            await asyncio.gather(blocking, queued_long, queued_short)
+        
+        asyncio.run(scenario())
+        
+        assert order == ["first", "short", "long"]
+        assert controller.stats()["running"] == 0
+        assert controller._admitted == {}
+    
+    def test_measures_seconds_per_frame(self, controller, clock):
+        def work():
+            clock.now += 10
+        
+        asyncio.run(controller.run(controller.admit("a", 50), work))
+        
+        # 0.2 s/frame measured, blended into the 0.1 s/frame prior
+        assert controller.seconds_per_frame == pytest.approx(0.12)
+    
+    def test_failed_job_releases_slot(self, controller):
+        def fail():
+            raise RuntimeError("decode error")
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(controller.run(controller.admit("a", 10), fail))
+        
+        assert controller.stats()["running"] == 0
+        controller.admit("a", 10)
+        controller.admit("a", 10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,250 @@
+"""
+Tests for the FastAPI endpoints.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+import src.api as api
+from src.admission import AdmissionController
+from src.job_queue import MemoryResultStore, SQLiteJobQueue
+from src.jobs import QueueExecutor
+
+
+def video_bytes(num_frames=10, fps=10):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "clip.mp4")
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (160, 120))
+        for i in range(num_frames):
+            out.write(np.full((120, 160, 3), i * 20, dtype=np.uint8))
+        out.release()
+        return Path(path).read_bytes()
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        upload_dir = Path(tmpdir) / "uploads"
+        output_dir = Path(tmpdir) / "outputs"
+        upload_dir.mkdir()
+        output_dir.mkdir()
+        monkeypatch.setattr(api, "UPLOAD_DIR", upload_dir)
+        monkeypatch.setattr(api, "OUTPUT_DIR", output_dir)
+        yield upload_dir, output_dir
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController(
+        max_wait_seconds=10,
+        per_client_limit=1,
+        short_clip_frames=5,
+        initial_seconds_per_frame=0.1
+    )
+    monkeypatch.setattr(api, "admission", controller)
+    return controller
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: the shutdown hook would close the
+    # module's shared detector
+    return TestClient(api.app)
+
+
+class FailingDetector:
+    """Finds no pose, then raises on frame `fail_at`."""
+    
+    def __init__(self, fail_at):
+        self.fail_at = fail_at
+        self.calls = 0
+    
+    def detect_pose(self, frame, is_rgb=False, timestamp_ms=None):
+        self.calls += 1
+        if self.calls >= self.fail_at:
+            raise RuntimeError("simulated failure")
+        return None
+
+
+def upload(client, data, headers=None):
+    return client.post(
+        "/api/analyze",
+        files={"video": ("clip.mp4", data, "video/mp4")},
+        headers=headers
+    )
+
+
+class TestAdmission:
+    
+    def test_over_capacity_is_rejected_before_storing(self, client, storage, admission):
+        # 300 frames at 0.1s each = 30s of running work
+        admission._running.append(admission.admit("other", 300))
+        
+        response = upload(client, b"not inspected")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "20"
+        assert response.json()["detail"]["retry_after_seconds"] == 20
+        assert list(storage[0].iterdir()) == []
+    
+    def test_client_over_its_limit(self, client, storage, admission):
+        # TestClient connects from the address "testclient"
+        admission.admit("testclient", 10)
+        
+        response = upload(client, b"not inspected")
+        
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert list(storage[0].iterdir()) == []
+    
+    def test_client_header_ignored_by_default(self, client, storage, admission):
+        admission.admit("testclient", 10)
+        
+        response = upload(client, b"not inspected", headers={"X-Client-ID": "someone-else"})
+        
+        assert response.status_code == 429
+    
+    def test_trusted_client_header(self, client, storage, admission, monkeypatch):
+        monkeypatch.setattr(api, "ADMISSION_CLIENT_ID_HEADER", "X-Client-ID")
+        admission.admit("dancer", 10)
+        
+        assert upload(client, b"not inspected", headers={"X-Client-ID": "dancer"}).status_code == 429
+        # Another id behind the same address gets past admission (and fails the probe)
+        assert upload(client, b"not inspected", headers={"X-Client-ID": "other"}).status_code == 400
+    
+    def test_long_clip_rejected_after_probe(self, client, storage, admission):
+        # Queued long work doesn't block the pre-check, but a 10 frame clip
+        # is in the long lane and would wait behind it
+        admission._waiting.append(admission.admit("other", 500))
+        
+        response = upload(client, video_bytes())
+        
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        # The stored upload is removed again
+        assert list(storage[0].iterdir()) == []
+
+
+
+class TestFailures:
+    
+    def test_failure_before_checkpoint_leaves_no_files(self, client, storage, admission, monkeypatch):
+        monkeypatch.setattr(api.video_processor, "pose_detector", FailingDetector(fail_at=5))
+        
+        response = upload(client, video_bytes())
+        
+        assert response.status_code == 500
+        assert "simulated failure" in response.json()["detail"]
+        # Upload, checkpoint directory and previews are all gone
+        assert list(storage[0].iterdir()) == []
+        assert list(storage[1].iterdir()) == []
+
+    
+    def test_complexity_needs_solutions_backend(self, client, storage, admission, monkeypatch):
+        monkeypatch.setattr(api, "POSE_BACKEND", "onnx")
+        
+        response = client.post(
+            "/api/analyze",
+            files={"video": ("clip.mp4", b"not inspected", "video/mp4")},
+            data={"target_fps": "30"}
+        )
+        
+        assert response.status_code == 400
+        assert "solutions pose backend" in response.json()["detail"]
+        assert list(storage[0].iterdir()) == []
+
+
+class TestQueueTimeout:
+    
+    @pytest.fixture
+    def queue(self, storage, monkeypatch):
+        queue = SQLiteJobQueue(str(storage[1] / "jobs.db"))
+        monkeypatch.setattr(api, "job_executor", QueueExecutor(queue, MemoryResultStore(), timeout=0.05, poll_interval=0.01))
+        monkeypatch.setattr(api, "result_store", MemoryResultStore())
+        return queue
+    
+    def test_unclaimed_job_is_cancelled_and_cleaned_up(self, client, storage, admission, queue):
+        response = upload(client, video_bytes())
+        
+        assert response.status_code == 500
+        assert "Timed out" in response.json()["detail"]
+        assert queue.stats()["failed"] == 1
+        assert list(storage[0].iterdir()) == []
+    
+    def test_claimed_job_keeps_its_files(self, client, storage, admission, queue, monkeypatch):
+        original_enqueue = queue.enqueue
+        
+        def enqueue_and_claim(*args):
+            original_enqueue(*args)
+            queue.claim("worker", 30)
+        
+        monkeypatch.setattr(queue, "enqueue", enqueue_and_claim)
+        response = upload(client, video_bytes())
+        
+        assert response.status_code == 504
+        detail = response.json()["detail"]
+        assert detail["status"] == "running"
+        assert len(list(storage[0].iterdir())) == 1
+        assert client.get(detail["status_url"]).json()["status"] == "running"
+
+
+class TestValidation:
+    
+    @pytest.mark.parametrize("data", [
+        {"frame_step": "0"},
+        {"start": "5", "end": "2"},
+        {"unit": "minutes"},
+        {"target_fps": "-1"},
+        {"deadline_seconds": "0"},
+    ])
+    def test_bad_request_leaves_no_upload(self, client, storage, admission, data):
+        response = client.post(
+            "/api/analyze",
+            files={"video": ("clip.mp4", video_bytes(), "video/mp4")},
+            data=data
+        )
+        
+        assert response.status_code == 400
+        assert list(storage[0].iterdir()) == []
+    
+    def test_invalid_video_leaves_no_upload(self, client, storage, admission):
+        response = upload(client, b"not a video")
+        
+        assert response.status_code == 400
+        assert list(storage[0].iterdir()) == []
+
+
+class TestPreviews:
+    
+    def test_preview_endpoints(self, client, storage, admission):
+        response = upload(client, video_bytes())
+        assert response.status_code == 200
+        video_id = response.json()["video_id"]
+        
+        sprite = client.get(f"/api/preview/{video_id}/sprite")
+        assert sprite.status_code == 200
+        assert sprite.headers["content-type"] == "image/jpeg"
+        assert sprite.content[:2] == b"\xff\xd8"
+        
+        clip = client.get(f"/api/preview/{video_id}/clip")
+        assert clip.status_code == 200
+        assert clip.headers["content-type"] == "video/mp4"
+        
+        client.delete(f"/api/cleanup/{video_id}")
+    
+    def test_unknown_video(self, client):
+        assert client.get("/api/preview/missing/sprite").status_code == 404
+        assert client.get("/api/preview/missing/clip").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+Unit tests for the backend benchmark and accuracy-comparison harness.
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_backends import parse_backend_spec, load_frames, compare_landmarks, benchmark
+from load_test import make_synthetic_video
+
+
+class TestBenchmarkBackends:
+
+    def test_parse_backend_spec(self):
+        assert parse_backend_spec("solutions") == ("solutions", {}, {})
+
+        name, detector_kwargs, backend_options = parse_backend_spec(
+            "onnx:model_path=models/pose.onnx,batch_size=8,intra_op_threads=4,min_detection_confidence=0.6"
+        )
+        assert name == "onnx"
+        assert detector_kwargs == {"min_detection_confidence": 0.6}
+        assert backend_options == {"model_path": "models/pose.onnx", "batch_size": 8, "intra_op_threads": 4}
+
+        assert parse_backend_spec("solutions:model_complexity=2,smooth_landmarks=false") == (
+            "solutions", {"model_complexity": 2}, {"smooth_landmarks": False}
+        )
+
+    def test_compare_landmarks(self):
+        rng = np.random.default_rng(0)
+        reference = rng.random((4, 33, 4)).astype(np.float32)
+        reference[..., 3] = 0.9
+        reference[3] = np.nan
+
+        candidate = reference.copy()
+        candidate[0, :, 0] += 0.1
+        candidate[1] = np.nan
+
+        result = compare_landmarks(reference, candidate, pck_threshold=0.05)
+
+        # Frame 1 disagrees (candidate missed it); frame 3 both missed
+        assert result["detection_agreement"] == pytest.approx(0.75)
+        assert result["frames_compared"] == 2
+        assert result["mean_error"] == pytest.approx(0.05, abs=1e-5)
+        assert result["pck@0.05"] == pytest.approx(0.5)
+
+    def test_compare_without_overlap(self):
+        reference = np.full((2, 33, 4), np.nan, dtype=np.float32)
+        result = compare_landmarks(reference, reference)
+
+        assert result["detection_agreement"] == 1.0
+        assert result["mean_error"] is None
+
+    def test_benchmark_report(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = make_synthetic_video(os.path.join(tmpdir, "clip.mp4"), seconds=0.5, width=160, height=120)
+            frames, fps = load_frames(path, max_frames=10)
+
+        assert len(frames) == 10
+        assert frames[0].shape == (120, 160, 3)
+
+        report = benchmark(["solutions", "solutions:smooth_landmarks=false"], frames, fps, warmup=2)
+
+        assert report["frames"] == 10
+        assert report["reference"] == "solutions"
+        assert set(report["backends"]) == {"solutions", "solutions:smooth_landmarks=false"}
+        assert report["backends"]["solutions"]["fps"] > 0
+        assert "vs_reference" not in report["backends"]["solutions"]
+        assert report["backends"]["solutions:smooth_landmarks=false"]["vs_reference"]["detection_agreement"] == 1.0
@@ -0,0 +1,205 @@
+"""
+Unit tests for checkpointed, resumable processing.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.checkpoint import Checkpoint, landmarks_to_array, array_to_landmarks
+from src.video_processor import VideoProcessor
+from src.pose_detector import PoseDetector
+from src.quality import QualityReport
+from src.previews import PreviewBuilder
+
+
+class CrashingDetector:
+    """Wraps a detector and raises once `crash_after` frames were detected."""
+
+    def __init__(self, detector, crash_after):
+        self.detector = detector
+        self.crash_after = crash_after
+        self.calls = []
+
+    def detect_pose(self, frame, is_rgb=False, timestamp_ms=None):
+        if len(self.calls) >= self.crash_after:
+            raise RuntimeError("simulated crash")
+        self.calls.append(frame)
+        return self.detector.detect_pose(frame, is_rgb=is_rgb)
+
+    def draw_skeleton(self, frame, landmarks):
+        return self.detector.draw_skeleton(frame, landmarks)
+
+
+class TestCheckpoint:
+
+    @pytest.fixture
+    def workdir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def detector(self):
+        detector = PoseDetector()
+        yield detector
+        detector.cleanup()
+
+    @pytest.fixture
+    def video_path(self, workdir):
+        path = os.path.join(workdir, "input.mp4")
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(path, fourcc, 30, (160, 120))
+        for i in range(45):
+            frame = np.zeros((120, 160, 3), dtype=np.uint8)
+            frame[:] = (i * 5, i * 5, i * 5)
+            out.write(frame)
+        out.release()
+        return path
+
+    def count_frames(self, path):
+        cap = cv2.VideoCapture(path)
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        return count
+
+    def test_landmark_array_round_trip(self):
+        assert array_to_landmarks(landmarks_to_array(None)) is None
+
+        values = np.random.default_rng(0).random((33, 4)).astype(np.float32)
+        landmarks = array_to_landmarks(values)
+        assert len(landmarks.landmark) == 33
+        np.testing.assert_allclose(landmarks_to_array(landmarks), values)
+
+    def test_invalid_interval(self, workdir):
+        with pytest.raises(ValueError):
+            Checkpoint(os.path.join(workdir, "ckpt"), interval=0)
+
+    def test_completed_run_removes_checkpoint(self, workdir, video_path, detector):
+        checkpoint = Checkpoint(os.path.join(workdir, "ckpt"), interval=10)
+        output_path = os.path.join(workdir, "output.mp4")
+
+        success, message = VideoProcessor(detector).process_video(video_path, output_path, checkpoint=checkpoint)
+
+        assert success, message
+        assert "Resumed" not in message
+        assert self.count_frames(output_path) == 45
+        assert not os.path.exists(checkpoint.directory)
+
+    def test_resume_after_crash(self, workdir, video_path, detector):
+        ckpt_dir = os.path.join(workdir, "ckpt")
+        output_path = os.path.join(workdir, "output.mp4")
+
+        crashing = CrashingDetector(detector, crash_after=25)
+        success, message = VideoProcessor(crashing).process_video(
+            video_path, output_path, checkpoint=Checkpoint(ckpt_dir, interval=10)
+        )
+        assert not success
+        assert "simulated crash" in message
+
+        # Two full segments survived the crash
+        checkpoint = Checkpoint(ckpt_dir, interval=10, warmup_frames=3)
+        assert checkpoint.exists()
+
+        resumed = CrashingDetector(detector, crash_after=1000)
+        quality_report = QualityReport()
+        preview_builder = PreviewBuilder(
+            os.path.join(workdir, "sprite.jpg"), os.path.join(workdir, "preview.mp4"),
+            thumbnail_interval=0.1
+        )
+        success, message = VideoProcessor(resumed).process_video(
+            video_path, output_path,
+            quality_report=quality_report,
+            preview_builder=preview_builder,
+            checkpoint=checkpoint
+        )
+
+        assert success, message
+        assert "Resumed from checkpoint at frame 20" in message
+        # 25 remaining frames plus 3 warm-up frames, not all 45 again
+        assert len(resumed.calls) == 28
+        assert self.count_frames(output_path) == 45
+        assert quality_report.frames_processed == 45
+        assert preview_builder.thumbnail_frames[0] == 0
+        assert not os.path.exists(ckpt_dir)
+
+    def test_resume_with_frame_step(self, workdir, video_path, detector):
+        ckpt_dir = os.path.join(workdir, "ckpt")
+        output_path = os.path.join(workdir, "output.mp4")
+
+        VideoProcessor(CrashingDetector(detector, crash_after=12)).process_video(
+            video_path, output_path, frame_step=2, checkpoint=Checkpoint(ckpt_dir, interval=5)
+        )
+
+        quality_report = QualityReport()
+        success, message = VideoProcessor(detector).process_video(
+            video_path, output_path, frame_step=2, quality_report=quality_report,
+            checkpoint=Checkpoint(ckpt_dir, interval=5, warmup_frames=2)
+        )
+
+        assert success, message
+        assert self.count_frames(output_path) == 23
+        assert quality_report.frames_processed == 23
+
+    def test_stale_checkpoint_is_discarded(self, workdir, video_path, detector):
+        ckpt_dir = os.path.join(workdir, "ckpt")
+        output_path = os.path.join(workdir, "output.mp4")
+
+        VideoProcessor(CrashingDetector(detector, crash_after=15)).process_video(
+            video_path, output_path, checkpoint=Checkpoint(ckpt_dir, interval=10)
+        )
+
+        # A different range doesn't match the saved state
+        counting = CrashingDetector(detector, crash_after=1000)
+        success, message = VideoProcessor(counting).process_video(
+            video_path, output_path, start=5, end=30, unit='frames',
+            checkpoint=Checkpoint(ckpt_dir, interval=10)
+        )
+
+        assert success, message
+        assert "Resumed" not in message
+        assert len(counting.calls) == 25
+
+    def test_concatenate_copies_packets(self, workdir):
+        av = pytest.importorskip("av")
+        checkpoint = Checkpoint(os.path.join(workdir, "ckpt"), interval=5)
+        checkpoint.load({"input_path": "input.mp4"})
+
+        for first in (0, 5):
+            out = cv2.VideoWriter(checkpoint.segment_path(), cv2.VideoWriter_fourcc(*'mp4v'), 30, (160, 120))
+            for i in range(first, first + 5):
+                out.write(np.full((120, 160, 3), i * 20, dtype=np.uint8))
+            out.release()
+            frames = list(range(first, first + 5))
+            checkpoint.commit_segment(frames, [landmarks_to_array(None)] * 5, first + 5)
+
+        def packets(path):
+            with av.open(path) as container:
+                stream = container.streams.video[0]
+                return [(bytes(p), float(p.pts * stream.time_base))
+                        for p in container.demux(stream) if p.dts is not None]
+
+        output_path = os.path.join(workdir, "output.mp4")
+        assert checkpoint.concatenate(output_path, 30, (160, 120))
+
+        segment_packets = []
+        for segment in checkpoint.segments:
+            segment_packets += packets(os.path.join(checkpoint.directory, segment["video"]))
+        output_packets = packets(output_path)
+
+        # Same encoded frames, not a second encode, on one continuous timeline
+        assert [data for data, _ in output_packets] == [data for data, _ in segment_packets]
+        assert [t for _, t in output_packets] == pytest.approx([i / 30 for i in range(10)], abs=1e-3)
+        assert self.count_frames(output_path) == 10
+
+    def test_saved_job(self, workdir):
+        checkpoint = Checkpoint(os.path.join(workdir, "ckpt"))
+        checkpoint.save_job({"video_id": "abc", "frame_step": 2})
+
+        assert Checkpoint.load_job(checkpoint.directory) == {"video_id": "abc", "frame_step": 2}
+        assert Checkpoint.load_job(os.path.join(workdir, "missing")) is None
@@ -0,0 +1,117 @@
+"""
+Unit tests for deadline-aware model complexity switching.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.complexity
+from src.complexity import ComplexityController, check_backend
+
+
+def run_frames(controller, clock, first_frame, count, seconds_per_frame):
+    for frame_index in range(first_frame, first_frame + count):
+        clock.now += seconds_per_frame[controller.level]
+        controller.update(frame_index)
+
+
+class TestComplexityController:
+    
+    def make_controller(self, clock, **kwargs):
+        # Detectors are never called here, so placeholders avoid loading models
+        detectors = {level: object() for level in (0, 1, 2)}
+        return ComplexityController(window=5, detectors=detectors, clock=clock, **kwargs)
+    
+    def test_only_solutions_backend_can_switch(self):
+        check_backend("solutions")
+        with pytest.raises(ValueError, match="solutions pose backend, not onnx"):
+            check_backend("onnx")
+    
+    def test_requires_a_target(self):
+        with pytest.raises(ValueError):
+            ComplexityController()
+    
+    def test_rejects_unknown_initial_level(self):
+        with pytest.raises(ValueError):
+            ComplexityController(target_fps=10, levels=(0, 1), initial_level=2)
+    
+    def test_downgrades_when_too_slow(self, clock):
+        controller = self.make_controller(clock, target_fps=20)
+        controller.begin(100)
+        # Level 1 runs at 10 fps, level 0 at 40 fps
+        run_frames(controller, clock, 0, 30, {0: 0.025, 1: 0.1, 2: 0.2})
+        controller.finish()
+        
+        assert controller.segments[0]['model_complexity'] == 1
+        assert controller.segments[-1]['model_complexity'] == 0
+        assert controller.segments[0]['end_frame'] + 1 == controller.segments[1]['start_frame']
+    
+    def test_upgrades_when_there_is_headroom(self, clock):
+        controller = self.make_controller(clock, target_fps=10)
+        controller.begin(100)
+        run_frames(controller, clock, 0, 40, {0: 0.01, 1: 0.02, 2: 0.04})
+        controller.finish()
+        
+        assert controller.level == 2
+        assert [s['model_complexity'] for s in controller.segments] == [1, 2]
+    
+    def test_deadline_drives_required_fps(self, clock):
+        controller = self.make_controller(clock, deadline_seconds=10)
+        controller.begin(200)
+        # 200 frames in 10s needs 20 fps; level 1 only manages 12.5
+        run_frames(controller, clock, 0, 200, {0: 0.02, 1: 0.08, 2: 0.2})
+        controller.finish()
+        
+        data = controller.to_dict()
+        levels = [s['model_complexity'] for s in data['segments']]
+        assert data['met_deadline'] is True
+        assert levels[:2] == [1, 0]
+        # Time banked on the fast model is spent on accuracy near the end
+        assert levels[-1] > 0
+        assert sum(s['frames'] for s in data['segments']) == 200
+    
+    def test_deadline_counts_time_spent_queued(self, clock):
+        controller = self.make_controller(clock, deadline_seconds=20, waited_seconds=10)
+        controller.begin(200)
+        # With 10s already gone, 200 frames need 20 fps rather than 10
+        run_frames(controller, clock, 0, 10, {0: 0.02, 1: 0.08, 2: 0.2})
+        
+        assert controller.level == 0
+        controller.finish()
+        data = controller.to_dict()
+        assert data['waited_seconds'] == 10
+        assert data['elapsed_seconds'] > 10
+    
+    def test_segments_cover_processed_frames(self, clock):
+        controller = self.make_controller(clock, target_fps=5)
+        controller.begin(12, first_frame=30)
+        run_frames(controller, clock, 30, 12, {0: 0.01, 1: 0.1, 2: 0.1})
+        controller.finish()
+        
+        segments = controller.to_dict()['segments']
+        assert segments[0]['start_frame'] == 30
+        assert segments[-1]['end_frame'] == 41
+        assert all(s['fps'] is not None for s in segments)
+    
+    def test_unloadable_level_falls_back(self, clock, monkeypatch):
+        def fail_to_load(**kwargs):
+            raise RuntimeError("model download failed")
+        
+        monkeypatch.setattr(src.complexity, "PoseDetector", fail_to_load)
+        controller = ComplexityController(
+            target_fps=10, window=5, detectors={1: object()}, clock=clock
+        )
+        controller.begin(100)
+        run_frames(controller, clock, 0, 6, {1: 0.01})
+        
+        assert controller.level == 2
+        assert controller.detector is controller.detectors[1]
+        assert controller.levels == [0, 1]
+        assert len(controller.segments) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
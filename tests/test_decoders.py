@@ -0,0 +1,163 @@
+"""
+Unit tests for the OpenCV and PyAV decode backends.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.decoders import open_decoder, OpenCVDecoder
+
+
+def write_test_video(output_path, num_frames=20, fps=30, size=(640, 480)):
+    """Frames get brighter by 10 per frame so neighbours differ"""
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_path, fourcc, fps, size)
+    for i in range(num_frames):
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame[:] = (i * 10, i * 10, i * 10)
+        out.write(frame)
+    out.release()
+    return output_path
+
+
+def read_sequentially(video_path, backend, frame_index):
+    decoder = open_decoder(video_path, backend)
+    for _ in range(frame_index + 1):
+        ret, frame = decoder.read()
+    frame = frame.copy()
+    decoder.release()
+    return frame
+
+
+@pytest.fixture
+def video_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield write_test_video(os.path.join(tmpdir, "test.mp4"))
+
+
+class TestOpenCVDecoder:
+    
+    def test_metadata(self, video_path):
+        decoder = open_decoder(video_path, 'opencv')
+        assert isinstance(decoder, OpenCVDecoder)
+        assert decoder.is_opened()
+        assert (decoder.width, decoder.height) == (640, 480)
+        assert decoder.fps == pytest.approx(30)
+        assert decoder.frame_count == 20
+        assert decoder.color == 'bgr'
+        decoder.release()
+    
+    def test_seek_grab_read(self, video_path):
+        decoder = open_decoder(video_path, 'opencv')
+        assert decoder.seek(5) == 5
+        assert decoder.grab()
+        ret, frame = decoder.read()
+        assert ret is True
+        assert np.array_equal(frame, read_sequentially(video_path, 'opencv', 6))
+        assert decoder.timestamp == pytest.approx(6 / 30, abs=1e-3)
+        decoder.release()
+    
+    def test_unknown_backend(self, video_path):
+        with pytest.raises(ValueError):
+            open_decoder(video_path, 'gstreamer')
+
+
+class TestPyAVDecoder:
+    
+    @pytest.fixture(autouse=True)
+    def require_pyav(self):
+        pytest.importorskip("av")
+    
+    def test_metadata(self, video_path):
+        decoder = open_decoder(video_path, 'pyav')
+        assert decoder.is_opened()
+        assert (decoder.width, decoder.height) == (640, 480)
+        assert decoder.fps == pytest.approx(30)
+        assert decoder.frame_count == 20
+        assert decoder.rotation == 0
+        assert decoder.color == 'rgb'
+        decoder.release()
+    
+    def test_open_invalid_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as f:
+            f.write(b"not a video")
+            f.flush()
+            decoder = open_decoder(f.name, 'pyav')
+            assert not decoder.is_opened()
+            decoder.release()
+    
+    def test_read_all_frames(self, video_path):
+        decoder = open_decoder(video_path, 'pyav')
+        frames = 0
+        while decoder.read()[0]:
+            frames += 1
+        assert frames == 20
+        assert decoder.timestamp == pytest.approx(19 / 30, abs=1e-3)
+        decoder.release()
+    
+    def test_seek_grab_read(self, video_path):
+        decoder = open_decoder(video_path, 'pyav')
+        assert decoder.seek(12) == 12
+        assert decoder.grab()
+        ret, frame = decoder.read()
+        assert ret is True
+        assert frame.shape == (480, 640, 3)
+        assert np.array_equal(frame, read_sequentially(video_path, 'pyav', 13))
+        assert decoder.timestamp == pytest.approx(13 / 30, abs=1e-3)
+        decoder.release()
+    
+    def test_buffer_pool_reused(self, video_path):
+        decoder = open_decoder(video_path, 'pyav', pool_size=2)
+        buffers = [decoder.read()[1] for _ in range(4)]
+        assert buffers[0] is buffers[2]
+        assert buffers[1] is buffers[3]
+        assert buffers[0] is not buffers[1]
+        decoder.release()
+    
+    def test_max_width_downscales(self, video_path):
+        decoder = open_decoder(video_path, 'pyav', max_width=320)
+        assert (decoder.width, decoder.height) == (320, 240)
+        ret, frame = decoder.read()
+        assert frame.shape == (240, 320, 3)
+        decoder.release()
+    
+    def test_rotation_applied(self):
+        import av
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rotated.mp4")
+            container = av.open(path, 'w')
+            stream = container.add_stream('mpeg4', rate=30)
+            stream.width, stream.height, stream.pix_fmt = 64, 32, 'yuv420p'
+            # Counterclockwise display rotation, like a phone held sideways
+            stream.set_display_rotation(90)
+            for _ in range(5):
+                # Left half white, right half black
+                pixels = np.zeros((32, 64, 3), dtype=np.uint8)
+                pixels[:, :32] = 255
+                for packet in stream.encode(av.VideoFrame.from_ndarray(pixels, format='rgb24')):
+                    container.mux(packet)
+            for packet in stream.encode():
+                container.mux(packet)
+            container.close()
+            
+            decoder = open_decoder(path, 'pyav')
+            assert decoder.rotation == 270
+            assert (decoder.width, decoder.height) == (32, 64)
+            ret, frame = decoder.read()
+            assert frame.shape == (64, 32, 3)
+            # After turning counterclockwise the white half is at the bottom
+            assert frame[-1, 16, 0] > 200
+            assert frame[0, 16, 0] < 50
+            decoder.release()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,349 @@
+"""
+Unit tests for the job queue, result store and queue workers.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import time
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.job_queue import (
+    MemoryResultStore, SQLiteJobQueue, SQLiteResultStore, open_backend, register_backend
+)
+from src.jobs import LocalExecutor, QueueExecutor
+from src.worker import Worker
+from src.video_processor import VideoProcessor
+from src.pose_detector import PoseDetector
+
+
+class StealingDetector(PoseDetector):
+    """Lets another worker take over the job once `steal_after` frames were
+    detected, as if this worker had stalled past its lease."""
+
+    def __init__(self, queue, clock, steal_after, pause=0.0):
+        super().__init__()
+        self.queue = queue
+        self.clock = clock
+        self.steal_after = steal_after
+        self.pause = pause
+        self.calls = 0
+
+    def detect_pose(self, frame, is_rgb=False, timestamp_ms=None):
+        self.calls += 1
+        if self.calls == self.steal_after:
+            self.clock.now += 31
+            assert self.queue.claim("w2", 30) is not None
+            # Give the heartbeat thread time to notice
+            time.sleep(self.pause)
+        return super().detect_pose(frame, is_rgb=is_rgb, timestamp_ms=timestamp_ms)
+
+
+class TestSQLiteJobQueue:
+
+    @pytest.fixture
+    def queue(self, clock):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield SQLiteJobQueue(os.path.join(tmpdir, "jobs.db"), max_attempts=2, clock=clock)
+
+    def test_claim_order(self, queue, clock):
+        queue.enqueue("long", {"n": 1}, priority=1)
+        clock.now += 1
+        queue.enqueue("short-a", {"n": 2}, priority=0)
+        clock.now += 1
+        queue.enqueue("short-b", {"n": 3}, priority=0)
+
+        claimed = [queue.claim("w", 30).id for _ in range(3)]
+        assert claimed == ["short-a", "short-b", "long"]
+        assert queue.claim("w", 30) is None
+
+    def test_payload_round_trip(self, queue):
+        queue.enqueue("job", {"input_path": "/tmp/x.mp4", "end_frame": None})
+        job = queue.claim("w", 30)
+
+        assert job.payload == {"input_path": "/tmp/x.mp4", "end_frame": None}
+        assert job.attempts == 1
+        assert queue.state("job") == ("running", None)
+
+    def test_complete_and_fail(self, queue):
+        queue.enqueue("a", {})
+        queue.enqueue("b", {})
+        queue.claim("w", 30)
+        queue.claim("w", 30)
+
+        assert queue.complete("a", "w")
+        assert queue.fail("b", "w", "bad video")
+        assert queue.state("a") == ("done", None)
+        assert queue.state("b") == ("failed", "bad video")
+        assert queue.stats() == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+
+    def test_cancel_only_unclaimed_jobs(self, queue):
+        queue.enqueue("waiting", {})
+        queue.enqueue("taken", {}, priority=-1)
+        queue.claim("w", 30)
+
+        assert queue.cancel("waiting", "gave up")
+        assert queue.state("waiting") == ("failed", "gave up")
+        assert queue.claim("w", 30) is None
+        assert not queue.cancel("taken", "gave up")
+        assert queue.state("taken") == ("running", None)
+
+    def test_expired_lease_is_reclaimed(self, queue, clock):
+        queue.enqueue("job", {})
+        queue.claim("dead-worker", 30)
+
+        # Still leased
+        assert queue.claim("other", 30) is None
+
+        clock.now += 31
+        job = queue.claim("other", 30)
+        assert job.id == "job"
+        assert job.attempts == 2
+
+        # The original worker has lost the job
+        assert not queue.heartbeat("job", "dead-worker", 30)
+        assert not queue.complete("job", "dead-worker")
+        assert queue.complete("job", "other")
+
+    def test_heartbeat_extends_lease(self, queue, clock):
+        queue.enqueue("job", {})
+        queue.claim("w", 30)
+
+        clock.now += 20
+        assert queue.heartbeat("job", "w", 30)
+        clock.now += 20
+        assert queue.claim("other", 30) is None
+
+    def test_gives_up_after_max_attempts(self, queue, clock):
+        queue.enqueue("poison", {})
+        queue.claim("w1", 30)
+        clock.now += 31
+        queue.claim("w2", 30)
+        clock.now += 31
+
+        assert queue.claim("w3", 30) is None
+        state, error = queue.state("poison")
+        assert state == "failed"
+        assert "expired" in error
+
+    def test_reenqueue_finished_job(self, queue):
+        queue.enqueue("job", {"attempt": 1})
+        queue.claim("w", 30)
+        queue.fail("job", "w", "interrupted")
+
+        queue.enqueue("job", {"attempt": 2})
+        assert queue.state("job") == ("queued", None)
+        job = queue.claim("w", 30)
+        assert job.payload == {"attempt": 2}
+        assert job.attempts == 1
+
+        # A running job is not reset by a duplicate enqueue
+        queue.enqueue("job", {"attempt": 3})
+        assert queue.state("job") == ("running", None)
+
+    def test_wait(self, queue):
+        queue.enqueue("job", {})
+        queue.claim("w", 30)
+
+        assert queue.wait("job", timeout=0.05, poll_interval=0.01)[0] == "failed"
+        queue.complete("job", "w")
+        assert queue.wait("job", timeout=1) == ("done", None)
+        assert queue.state("missing") is None
+
+
+class TestResultStores:
+
+    def test_memory_store(self):
+        store = MemoryResultStore()
+        store.put("a", {"status": "completed"})
+
+        assert store.get("a") == {"status": "completed"}
+        store.delete("a")
+        store.delete("a")
+        assert store.get("a") is None
+
+    def test_sqlite_store_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "jobs.db")
+            SQLiteResultStore(path).put("a", {"quality": {"detection_rate": 90.0}})
+
+            other = SQLiteResultStore(path)
+            assert other.get("a") == {"quality": {"detection_rate": 90.0}}
+            other.delete("a")
+            assert SQLiteResultStore(path).get("a") is None
+
+    def test_open_backend(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue, store = open_backend(f"sqlite:///{tmpdir}/jobs.db")
+            assert isinstance(queue, SQLiteJobQueue)
+            assert isinstance(store, SQLiteResultStore)
+
+        with pytest.raises(ValueError):
+            open_backend("nosuch://somewhere")
+        with pytest.raises(ValueError):
+            open_backend("jobs.db")
+
+    def test_register_backend(self):
+        store = MemoryResultStore()
+        register_backend("test-memory", lambda location: (None, store))
+
+        assert open_backend("test-memory://anything") == (None, store)
+
+
+class TestWorker:
+
+    @pytest.fixture
+    def workdir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def processor(self):
+        processor = VideoProcessor()
+        yield processor
+        processor.cleanup()
+
+    def make_job(self, workdir, video_id="job-1", frames=5):
+        input_path = os.path.join(workdir, f"{video_id}.mp4")
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(input_path, fourcc, 30, (160, 120))
+        for _ in range(frames):
+            out.write(np.zeros((120, 160, 3), dtype=np.uint8))
+        out.release()
+
+        return {
+            "video_id": video_id,
+            "original_filename": "dance.mp4",
+            "input_path": input_path,
+            "output_path": os.path.join(workdir, f"{video_id}_processed.mp4"),
+            "quality_path": os.path.join(workdir, f"{video_id}_quality.json"),
+            "sprite_path": os.path.join(workdir, f"{video_id}_sprite.jpg"),
+            "preview_clip_path": os.path.join(workdir, f"{video_id}_preview.mp4"),
+            "video_info": {"fps": 30, "frame_count": frames, "width": 160, "height": 120},
+            "start_frame": 0,
+            "end_frame": frames,
+            "frame_step": 1,
+            "target_fps": None,
+            "deadline_seconds": None
+        }
+
+    def test_worker_processes_queued_job(self, workdir, processor):
+        queue, store = open_backend(f"sqlite:///{workdir}/jobs.db")
+        job = self.make_job(workdir)
+        queue.enqueue(job["video_id"], job)
+
+        worker = Worker(queue, store, processor, worker_id="w1", lease_seconds=30)
+        assert worker.run_once()
+        assert not worker.run_once()
+
+        assert queue.state("job-1") == ("done", None)
+        record = store.get("job-1")
+        assert record["status"] == "completed"
+        assert record["quality"]["frames_processed"] == 5
+        assert os.path.exists(job["output_path"])
+        assert os.path.exists(job["quality_path"])
+
+    def test_worker_marks_failures(self, workdir, processor):
+        queue, store = open_backend(f"sqlite:///{workdir}/jobs.db")
+        job = self.make_job(workdir)
+        job["input_path"] = os.path.join(workdir, "missing.mp4")
+        queue.enqueue(job["video_id"], job)
+
+        Worker(queue, store, processor, worker_id="w1").run_once()
+
+        state, error = queue.state("job-1")
+        assert state == "failed"
+        assert error
+        assert store.get("job-1") is None
+
+    def test_worker_abandons_job_after_losing_lease(self, workdir, clock):
+        queue = SQLiteJobQueue(os.path.join(workdir, "jobs.db"), clock=clock)
+        store = SQLiteResultStore(os.path.join(workdir, "jobs.db"))
+        job = self.make_job(workdir, frames=20)
+        queue.enqueue(job["video_id"], job)
+
+        detector = StealingDetector(queue, clock, steal_after=3, pause=0.5)
+        worker = Worker(queue, store, VideoProcessor(detector), worker_id="w1",
+                        lease_seconds=30, heartbeat_interval=0.05)
+        assert worker.run_once()
+        worker.cleanup()
+
+        # Stopped soon after the heartbeat failed, and left the job to w2
+        assert detector.calls < 20
+        assert queue.state("job-1") == ("running", None)
+        assert store.get("job-1") is None
+
+    def test_worker_checks_ownership_before_storing(self, workdir, clock):
+        queue = SQLiteJobQueue(os.path.join(workdir, "jobs.db"), clock=clock)
+        store = SQLiteResultStore(os.path.join(workdir, "jobs.db"))
+        job = self.make_job(workdir)
+        queue.enqueue(job["video_id"], job)
+
+        # Heartbeats never run, so the job is finished before the loss is seen
+        detector = StealingDetector(queue, clock, steal_after=3)
+        worker = Worker(queue, store, VideoProcessor(detector), worker_id="w1",
+                        lease_seconds=30, heartbeat_interval=3600)
+        assert worker.run_once()
+        worker.cleanup()
+
+        assert detector.calls == 5
+        assert queue.state("job-1") == ("running", None)
+        assert store.get("job-1") is None
+
+    def test_queue_executor_waits_for_worker(self, workdir, processor):
+        import threading
+
+        queue, store = open_backend(f"sqlite:///{workdir}/jobs.db")
+        job = self.make_job(workdir)
+        worker = Worker(queue, store, processor, worker_id="w1")
+        thread = threading.Thread(target=worker.run, kwargs={"poll_interval": 0.01, "max_jobs": 1})
+        thread.start()
+
+        success, record = QueueExecutor(queue, store, timeout=60, poll_interval=0.01).run(job)
+        thread.join()
+
+        assert success
+        assert record["range"] == {"start_frame": 0, "end_frame": 5, "frame_step": 1}
+
+    def test_queue_executor_cancels_unclaimed_job_on_timeout(self, workdir):
+        queue, store = open_backend(f"sqlite:///{workdir}/jobs.db")
+        job = self.make_job(workdir)
+
+        success, record = QueueExecutor(queue, store, timeout=0.05, poll_interval=0.01).run(job)
+
+        assert not success
+        assert record["status"] == "failed"
+        # A worker starting later finds nothing to do
+        assert queue.state("job-1")[0] == "failed"
+        assert queue.claim("w1", 30) is None
+
+    def test_queue_executor_leaves_claimed_job_running_on_timeout(self, workdir):
+        queue, store = open_backend(f"sqlite:///{workdir}/jobs.db")
+        job = self.make_job(workdir)
+        original_enqueue = queue.enqueue
+
+        def enqueue_and_claim(*args):
+            original_enqueue(*args)
+            queue.claim("w1", 30)
+
+        queue.enqueue = enqueue_and_claim
+        success, record = QueueExecutor(queue, store, timeout=0.05, poll_interval=0.01).run(job)
+
+        assert not success
+        assert record["status"] == "running"
+        assert queue.state("job-1") == ("running", None)
+
+    def test_local_executor_matches_worker_record(self, workdir, processor):
+        store = MemoryResultStore()
+        job = self.make_job(workdir)
+
+        success, record = LocalExecutor(processor, store).run(job)
+
+        assert success
+        assert store.get("job-1") is record
+        assert record["original_filename"] == "dance.mp4"
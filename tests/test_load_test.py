@@ -0,0 +1,83 @@
+"""
+Tests for the load-testing harness.
+"""
+
+import asyncio
+import pytest
+import numpy as np
+import cv2
+import httpx
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from load_test import make_synthetic_video, parse_mix, summarize, run_load_test
+
+
+class TestLoadTestHelpers:
+    
+    def test_synthetic_video_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = make_synthetic_video(os.path.join(tmpdir, "a.mp4"), seconds=0.5, width=160, height=120, seed=3)
+            second = make_synthetic_video(os.path.join(tmpdir, "b.mp4"), seconds=0.5, width=160, height=120, seed=3)
+            
+            assert Path(first).read_bytes() == Path(second).read_bytes()
+            cap = cv2.VideoCapture(first)
+            assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 15
+            assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 160
+            cap.release()
+    
+    def test_parse_mix(self):
+        assert parse_mix("analyze=1,health=3") == {"analyze": 1.0, "health": 3.0}
+        with pytest.raises(ValueError):
+            parse_mix("upload=1")
+    
+    def test_summarize(self):
+        results = [{"kind": "health", "status": 200, "latency": i / 1000} for i in range(1, 101)]
+        results.append({"kind": "analyze", "status": 503, "latency": 0.001})
+        results.append({"kind": "analyze", "status": 500, "latency": 0.001})
+        results.append({"kind": "analyze", "status": None, "latency": 0.001})
+        
+        summary = summarize(results)
+        assert summary["requests"] == 103
+        assert summary["errors"] == 2
+        assert summary["rejected"] == 1
+        assert summary["status_codes"] == {"200": 100, "503": 1, "500": 1, "exception": 1}
+        assert summary["latency_ms"]["max"] == 100.0
+        assert summary["latency_ms"]["p50"] == pytest.approx(np.percentile(
+            [r["latency"] * 1000 for r in results], 50
+        ), abs=0.01)
+    
+    def test_summarize_empty(self):
+        assert summarize([])["latency_ms"] is None
+
+
+class TestLoadTestInProcess:
+    
+    def test_short_run_against_app(self):
+        from src.api import app
+        
+        async def scenario(video):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+                return await run_load_test(
+                    client, [video], duration=1.0, rate=4.0,
+                    mix=parse_mix("analyze=1,status=1,download=1,health=1")
+                )
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            video = make_synthetic_video(os.path.join(tmpdir, "clip.mp4"), seconds=0.3, width=160, height=120)
+            report = asyncio.run(scenario(video))
+        
+        assert report["overall"]["requests"] == 4
+        assert report["overall"]["errors"] == 0
+        # The first request is always an analyze so later ones have a job to query
+        assert "analyze" in report["endpoints"]
+        assert report["throughput_rps"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
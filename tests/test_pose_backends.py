@@ -0,0 +1,204 @@
+"""
+Unit tests for the pluggable pose inference backends.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pose_backends import (
+    POSE_BACKENDS, SolutionsBackend, TasksBackend, create_backend, decode_blazepose, letterbox
+)
+from src.pose_detector import PoseDetector
+from src.jobs import execute_job
+from src.quality import QualityReport
+from src.video_processor import VideoProcessor
+
+
+INPUT_SIZE = 64
+
+
+def blazepose_output(points, transform, frame_size, visibility_logit=4.0):
+    """Raw 39 x 5 landmark output that decodes to normalized `points`."""
+
+    scale, pad_x, pad_y = transform
+    width, height = frame_size
+    raw = np.zeros((39, 5), dtype=np.float32)
+    raw[:33, 0] = points[:, 0] * width * scale + pad_x
+    raw[:33, 1] = points[:, 1] * height * scale + pad_y
+    raw[:33, 3] = visibility_logit
+    return raw.reshape(-1)
+
+
+def write_constant_model(path, landmarks, score):
+    """ONNX model with a dynamic batch whose outputs ignore the pixels."""
+
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper
+
+    nodes = [
+        helper.make_node("ReduceMean", ["input"], ["mean"], axes=[1, 2, 3], keepdims=1),
+        helper.make_node("Mul", ["mean", "zero"], ["zeros"]),
+        helper.make_node("Reshape", ["zeros", "column"], ["zeros_2d"]),
+        helper.make_node("Add", ["zeros_2d", "landmarks_value"], ["landmarks"]),
+        helper.make_node("Add", ["zeros_2d", "score_value"], ["score"]),
+    ]
+    initializers = [
+        helper.make_tensor("zero", TensorProto.FLOAT, [], [0.0]),
+        helper.make_tensor("column", TensorProto.INT64, [2], [-1, 1]),
+        helper.make_tensor("landmarks_value", TensorProto.FLOAT, [1, 195], landmarks.tolist()),
+        helper.make_tensor("score_value", TensorProto.FLOAT, [1, 1], [score]),
+    ]
+    graph = helper.make_graph(
+        nodes, "constant_pose",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", INPUT_SIZE, INPUT_SIZE, 3])],
+        [helper.make_tensor_value_info("landmarks", TensorProto.FLOAT, ["N", 195]),
+         helper.make_tensor_value_info("score", TensorProto.FLOAT, ["N", 1])],
+        initializers
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+    return path
+
+
+class TestHelpers:
+
+    def test_letterbox_geometry(self):
+        frame = np.full((120, 160, 3), 255, dtype=np.uint8)
+        square, (scale, pad_x, pad_y) = letterbox(frame, 64)
+
+        assert square.shape == (64, 64, 3)
+        assert square.dtype == np.float32
+        assert scale == pytest.approx(0.4)
+        assert (pad_x, pad_y) == (0, 8)
+        # Padding is black, the frame is scaled to [0, 1]
+        assert square[0, 0, 0] == 0.0
+        assert square[32, 32, 0] == pytest.approx(1.0)
+
+    def test_decode_blazepose(self):
+        points = np.random.default_rng(0).random((33, 2))
+        transform = letterbox(np.zeros((120, 160, 3), dtype=np.uint8), 64)[1]
+
+        landmarks = decode_blazepose(blazepose_output(points, transform, (160, 120)), transform, (160, 120))
+
+        assert len(landmarks.landmark) == 33
+        decoded = np.array([(lm.x, lm.y) for lm in landmarks.landmark])
+        np.testing.assert_allclose(decoded, points, atol=1e-4)
+        assert landmarks.landmark[0].visibility == pytest.approx(1 / (1 + np.exp(-4.0)), abs=1e-5)
+
+
+class TestBackends:
+
+    def test_backend_names(self):
+        assert POSE_BACKENDS == ('solutions', 'tasks', 'onnx')
+
+    def test_solutions_backend(self):
+        backend = create_backend('solutions')
+        assert isinstance(backend, SolutionsBackend)
+
+        frames = [np.zeros((120, 160, 3), dtype=np.uint8) for _ in range(3)]
+        assert backend.process_batch(frames, [0.0, 33.3, 66.7]) == [None, None, None]
+        backend.close()
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_backend('tensorrt')
+
+    def test_model_path_required(self):
+        with pytest.raises(ValueError):
+            create_backend('tasks')
+
+    def test_tasks_missing_model(self):
+        with pytest.raises(Exception):
+            create_backend('tasks', model_path='/nonexistent/pose_landmarker_full.task')
+
+    def test_tasks_timestamps_stay_increasing(self):
+        # Timestamp bookkeeping only, no model needed
+        backend = TasksBackend.__new__(TasksBackend)
+        backend._offset_ms = 0
+        backend._last_input_ms = None
+        backend._last_sent_ms = -1
+
+        sent = [backend._next_timestamp(t) for t in (0.0, 33.3, 66.7)]
+        # A second video through the same detector starts at 0 again
+        sent += [backend._next_timestamp(t) for t in (0.0, 33.3)]
+        sent.append(backend._next_timestamp(None))
+
+        assert sent == sorted(set(sent))
+        assert sent[3] > sent[2]
+
+
+class TestOnnxBackend:
+
+    @pytest.fixture
+    def workdir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+    @pytest.fixture
+    def points(self):
+        return np.random.default_rng(1).uniform(0.2, 0.8, size=(33, 2))
+
+    @pytest.fixture
+    def model_path(self, workdir, points):
+        pytest.importorskip("onnxruntime")
+        # Square frames letterbox with no padding, so one output fits all
+        transform = (INPUT_SIZE / 96, 0, 0)
+        raw = blazepose_output(points, transform, (96, 96))
+        return write_constant_model(os.path.join(workdir, "pose.onnx"), raw, score=0.9)
+
+    def test_batched_inference(self, model_path, points):
+        backend = create_backend('onnx', model_path=model_path, batch_size=4, intra_op_threads=2)
+
+        assert backend.input_size == INPUT_SIZE
+        assert backend.batch_size == 4
+        assert backend.session.get_session_options().intra_op_num_threads == 2
+
+        frames = [np.zeros((96, 96, 3), dtype=np.uint8) for _ in range(6)]
+        results = backend.process_batch(frames)
+
+        assert len(results) == 6
+        decoded = np.array([(lm.x, lm.y) for lm in results[5].landmark])
+        np.testing.assert_allclose(decoded, points, atol=1e-4)
+
+    def test_low_score_means_no_pose(self, model_path):
+        backend = create_backend('onnx', model_path=model_path, min_detection_confidence=0.95)
+        assert backend.process(np.zeros((96, 96, 3), dtype=np.uint8)) is None
+
+    def test_complexity_jobs_rejected(self, workdir, model_path):
+        detector = PoseDetector(backend='onnx', backend_options={'model_path': model_path})
+        job = {"target_fps": 30, "checkpoint_path": os.path.join(workdir, "ckpt")}
+
+        success, record = execute_job(VideoProcessor(detector), job)
+
+        # Not run on stand-in Solutions models behind the operator's back
+        assert not success
+        assert record["status"] == "failed"
+        assert "solutions" in record["message"]
+        assert not os.path.exists(job["checkpoint_path"])
+
+    def test_video_processor_batches(self, workdir, model_path):
+        input_path = os.path.join(workdir, "input.mp4")
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(input_path, fourcc, 30, (96, 96))
+        for i in range(11):
+            out.write(np.full((96, 96, 3), i * 10, dtype=np.uint8))
+        out.release()
+
+        detector = PoseDetector(backend='onnx', backend_options={'model_path': model_path, 'batch_size': 4})
+        assert detector.pose is None
+        quality_report = QualityReport()
+        success, message = VideoProcessor(detector).process_video(
+            input_path, os.path.join(workdir, "output.mp4"), frame_step=2, quality_report=quality_report
+        )
+
+        assert success, message
+        assert "Processed 6 frames" in message
+        assert quality_report.frames_detected == 6
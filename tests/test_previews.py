@@ -0,0 +1,101 @@
+"""
+Unit tests for preview sprite sheets and clips.
+"""
+
+import pytest
+import numpy as np
+import cv2
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.previews import PreviewBuilder
+
+
+class TestPreviewBuilder:
+    
+    @pytest.fixture
+    def tmpdir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+    
+    def make_builder(self, tmpdir, **kwargs):
+        return PreviewBuilder(
+            os.path.join(tmpdir, "sprite.jpg"),
+            os.path.join(tmpdir, "preview.mp4"),
+            **kwargs
+        )
+    
+    def feed(self, builder, num_frames, start_frame=0):
+        for i in range(start_frame, start_frame + num_frames):
+            frame = np.full((480, 640, 3), i % 256, dtype=np.uint8)
+            builder.add(i, frame)
+    
+    def test_thumbnails_at_fixed_interval(self, tmpdir):
+        builder = self.make_builder(tmpdir, thumbnail_interval=1.0, sprite_columns=4)
+        builder.begin(30, 640, 480, 0, 300)
+        self.feed(builder, 300)
+        assert builder.finish() is True
+        
+        data = builder.to_dict()
+        assert data['sprite']['frames'] == list(range(0, 300, 30))
+        assert (data['sprite']['thumbnail_width'], data['sprite']['thumbnail_height']) == (160, 120)
+        assert (data['sprite']['columns'], data['sprite']['rows']) == (4, 3)
+        
+        sheet = cv2.imread(builder.sprite_path)
+        assert sheet.shape == (3 * 120, 4 * 160, 3)
+    
+    def test_thumbnail_count_capped(self, tmpdir):
+        builder = self.make_builder(tmpdir, max_thumbnails=5)
+        builder.begin(30, 640, 480, 100, 600)
+        self.feed(builder, 600, start_frame=100)
+        builder.finish()
+        
+        frames = builder.to_dict()['sprite']['frames']
+        assert frames == [100, 220, 340, 460, 580]
+    
+    def test_clip_is_short_and_small(self, tmpdir):
+        builder = self.make_builder(tmpdir, clip_fps=10, clip_max_seconds=2)
+        builder.begin(30, 640, 480, 0, 900)
+        self.feed(builder, 900)
+        builder.finish()
+        
+        clip = cv2.VideoCapture(builder.clip_path)
+        assert int(clip.get(cv2.CAP_PROP_FRAME_COUNT)) == 20
+        assert int(clip.get(cv2.CAP_PROP_FRAME_WIDTH)) == 320
+        assert int(clip.get(cv2.CAP_PROP_FRAME_HEIGHT)) == 240
+        clip.release()
+        assert builder.to_dict()['clip']['frames'] == 20
+    
+    def test_sampled_input_frames(self, tmpdir):
+        # With frame_step the processor only offers every Nth frame
+        builder = self.make_builder(tmpdir, thumbnail_interval=0.5)
+        builder.begin(30, 640, 480, 0, 90)
+        for i in range(0, 90, 4):
+            builder.add(i, np.zeros((480, 640, 3), dtype=np.uint8))
+        builder.finish()
+        
+        assert builder.to_dict()['sprite']['frames'] == [0, 16, 32, 48, 64, 80]
+    
+    def test_no_frames(self, tmpdir):
+        builder = self.make_builder(tmpdir)
+        builder.begin(30, 640, 480, 0, 0)
+        assert builder.finish() is False
+        assert not os.path.exists(builder.sprite_path)
+
+    
+    def test_discard(self, tmpdir):
+        builder = self.make_builder(tmpdir)
+        builder.begin(30, 640, 480, 0, 30)
+        self.feed(builder, 10)
+        builder.discard()
+        
+        assert not os.path.exists(builder.clip_path)
+        assert not os.path.exists(builder.sprite_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
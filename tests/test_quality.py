@@ -0,0 +1,84 @@
+"""
+Unit tests for detection quality metrics.
+"""
+
+import pytest
+from types import SimpleNamespace
+from pathlib import Path
+import sys
+import tempfile
+import os
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.quality import QualityReport, LANDMARK_NAMES
+
+
+def make_landmarks(visibility):
+    """Build a stand-in for MediaPipe's NormalizedLandmarkList"""
+    return SimpleNamespace(
+        landmark=[SimpleNamespace(visibility=visibility) for _ in LANDMARK_NAMES]
+    )
+
+
+class TestQualityReport:
+    
+    @pytest.fixture
+    def report(self):
+        return QualityReport()
+    
+    def test_empty_report(self, report):
+        report.finish(30)
+        data = report.to_dict()
+        assert data['frames_processed'] == 0
+        assert data['detection_rate'] == 0.0
+        assert data['dropout_segments'] == []
+    
+    def test_detection_metrics(self, report):
+        report.update(0, make_landmarks(0.9))
+        report.update(1, make_landmarks(0.3))
+        report.update(2, None)
+        report.update(3, make_landmarks(0.9))
+        report.finish(30)
+        
+        data = report.to_dict()
+        assert data['frames_processed'] == 4
+        assert data['frames_detected'] == 3
+        assert data['detection_rate'] == pytest.approx(75.0)
+        assert data['average_confidence'] == pytest.approx(0.7)
+        assert data['average_visible_keypoints'] == pytest.approx(22.0)
+        assert data['min_visible_keypoints'] == 0
+    
+    def test_visibility_histograms(self, report):
+        report.update(0, make_landmarks(0.95))
+        report.update(1, make_landmarks(1.0))
+        report.update(2, make_landmarks(0.05))
+        
+        data = report.to_dict()
+        histogram = data['landmark_visibility']['histograms']['nose']
+        assert len(data['landmark_visibility']['bin_edges']) == 11
+        assert histogram[-1] == 2
+        assert histogram[0] == 1
+        assert set(data['landmark_visibility']['histograms']) == set(LANDMARK_NAMES)
+    
+    def test_dropout_segments(self, report):
+        for i in range(10):
+            report.update(i, None if i in (2, 3, 4, 8, 9) else make_landmarks(0.9))
+        report.finish(10)
+        
+        segments = report.to_dict()['dropout_segments']
+        assert [(s['start_frame'], s['end_frame']) for s in segments] == [(2, 4), (8, 9)]
+        assert segments[0]['start_seconds'] == pytest.approx(0.2)
+    
+    def test_save_and_load(self, report):
+        report.update(0, make_landmarks(0.8))
+        report.finish(30)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "quality.json")
+            report.save(path)
+            assert QualityReport.load(path) == report.to_dict()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
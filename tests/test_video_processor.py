@@ -15,6 +15,51 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.video_processor import VideoProcessor
 from src.pose_detector import PoseDetector
+from src.quality import QualityReport
+from src.complexity import ComplexityController
+from src.previews import PreviewBuilder
+
+
+def write_av_video(output_path, timestamps_ms, size=(64, 48), rotation=0):
+    """Video with the given frame presentation times, e.g. variable frame rate"""
+    av = pytest.importorskip("av")
+    from fractions import Fraction
+    
+    container = av.open(output_path, 'w')
+    stream = container.add_stream('mpeg4', rate=30)
+    stream.width, stream.height, stream.pix_fmt = size[0], size[1], 'yuv420p'
+    stream.codec_context.time_base = Fraction(1, 1000)
+    if rotation:
+        stream.set_display_rotation(rotation)
+    for pts in timestamps_ms:
+        frame = av.VideoFrame.from_ndarray(np.zeros((size[1], size[0], 3), dtype=np.uint8), format='rgb24')
+        frame.pts, frame.time_base = pts, Fraction(1, 1000)
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    return output_path
+
+
+class RecordingDetector:
+    """Finds no pose, but remembers the timestamps it was given. Raises
+    once `fail_after` frames were seen, if set"""
+    
+    batch_size = 1
+    
+    def __init__(self, fail_after=None):
+        self.timestamps = []
+        self.fail_after = fail_after
+    
+    def detect_pose(self, frame, is_rgb=False, timestamp_ms=None):
+        if self.fail_after is not None and len(self.timestamps) >= self.fail_after:
+            raise RuntimeError("simulated failure")
+        self.timestamps.append(timestamp_ms)
+        return None
+    
+    def cleanup(self):
+        pass
 
 
 class TestVideoProcessor:
@@ -100,6 +145,214 @@ class TestVideoProcessor:
             assert info['frame_count'] == 30
             assert 'duration_seconds' in info
     
+    def test_fractional_fps_range(self, processor, create_test_video):
+        """Test seconds map to frames using the exact, non-integer fps"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            video_path = os.path.join(tmpdir, "test.mp4")
+            create_test_video(video_path, num_frames=5, fps=29.97)
+            
+            info = processor.get_video_info(video_path)
+            
+            assert info['fps'] == pytest.approx(29.97, abs=0.01)
+            # int(29.97) would give frame 435
+            assert VideoProcessor.resolve_frame_range(15, None, 'seconds', info['fps'], 1000) == (450, 1000)
+    
+    @pytest.mark.parametrize("decode_backend", ['opencv', 'pyav'])
+    def test_variable_frame_rate_timestamps(self, decode_backend):
+        """Test the detector gets the decoder's presentation times, not index / fps"""
+        timestamps = [0, 33, 100, 133, 250]
+        detector = RecordingDetector()
+        processor = VideoProcessor(detector, decode_backend=decode_backend)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = write_av_video(os.path.join(tmpdir, "vfr.mp4"), timestamps)
+            
+            success, _ = processor.process_video(input_path, os.path.join(tmpdir, "output.mp4"))
+        
+        assert success is True
+        assert detector.timestamps == pytest.approx(timestamps)
+    
+    def test_get_video_info_reports_rotation(self):
+        """Test rotation and the decoded frame size are part of the metadata"""
+        processor = VideoProcessor(RecordingDetector(), decode_backend='pyav')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            video_path = write_av_video(os.path.join(tmpdir, "rotated.mp4"), range(0, 150, 33), rotation=90)
+            
+            info = processor.get_video_info(video_path)
+        
+        assert info['rotation'] == 270
+        # PyAV turns frames upright, so they come out portrait
+        assert (info['width'], info['height']) == (48, 64)
+    
+    def test_process_video_time_range(self, processor, create_test_video):
+        """Test processing only a span of the video"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=30, fps=10)
+
+            success, message = processor.process_video(
+                input_path, output_path, start=1.0, end=2.0
+            )
+
+            assert success is True
+            assert "processed 10 frames" in message.lower()
+            info = processor.get_video_info(output_path)
+            assert info['frame_count'] == 10
+
+    def test_process_video_sampled_frames(self, processor, create_test_video):
+        """Test frame_step only processes every Nth frame of the span"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=20, fps=30)
+
+            success, message = processor.process_video(
+                input_path, output_path, start=4, end=16, unit='frames', frame_step=3
+            )
+
+            assert success is True
+            assert "processed 4 frames" in message.lower()
+
+    def test_process_video_invalid_range(self, processor, create_test_video):
+        """Test empty or malformed ranges are rejected"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=10)
+
+            success, _ = processor.process_video(input_path, output_path, start=5, end=5, unit='frames')
+            assert success is False
+            success, _ = processor.process_video(input_path, output_path, unit='minutes')
+            assert success is False
+            success, _ = processor.process_video(input_path, output_path, frame_step=0)
+            assert success is False
+
+    def test_process_video_collects_quality_report(self, processor, create_test_video):
+        """Test quality metrics are gathered during the processing pass"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=6)
+
+            report = QualityReport()
+            success, _ = processor.process_video(input_path, output_path, quality_report=report)
+
+            assert success is True
+            data = report.to_dict()
+            assert data['frames_processed'] == 6
+            # Blank frames contain no person, so the whole clip is one dropout
+            assert data['frames_detected'] == 0
+            assert [(s['start_frame'], s['end_frame']) for s in data['dropout_segments']] == [(0, 5)]
+
+    def test_process_video_records_complexity_segments(self, processor, create_test_video):
+        """Test the complexity controller drives detection and logs frame ranges"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=8)
+
+            controller = ComplexityController(
+                target_fps=1,
+                levels=(1,),
+                detectors={1: processor.pose_detector}
+            )
+            success, _ = processor.process_video(input_path, output_path, complexity_controller=controller)
+
+            assert success is True
+            segments = controller.to_dict()['segments']
+            assert [(s['model_complexity'], s['start_frame'], s['end_frame']) for s in segments] == [(1, 0, 7)]
+
+    def test_process_video_with_pyav_backend(self, create_test_video):
+        """Test the PyAV decode backend produces the same output layout"""
+        pytest.importorskip("av")
+        processor = VideoProcessor(decode_backend='pyav')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=12)
+
+            success, message = processor.process_video(
+                input_path, output_path, start=2, end=10, unit='frames', frame_step=2
+            )
+
+            assert success is True
+            assert "processed 4 frames" in message.lower()
+            info = processor.get_video_info(output_path)
+            assert (info['width'], info['height']) == (640, 480)
+
+    def test_unknown_decode_backend(self):
+        """Test unsupported backends are rejected up front"""
+        with pytest.raises(ValueError):
+            VideoProcessor(decode_backend='gstreamer')
+
+    def test_process_video_builds_previews(self, processor, create_test_video):
+        """Test previews are sampled from the same processing pass"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            output_path = os.path.join(tmpdir, "test_output.mp4")
+            create_test_video(input_path, num_frames=10, fps=5)
+
+            builder = PreviewBuilder(
+                os.path.join(tmpdir, "sprite.jpg"),
+                os.path.join(tmpdir, "preview.mp4")
+            )
+            success, _ = processor.process_video(input_path, output_path, preview_builder=builder)
+
+            assert success is True
+            assert os.path.exists(builder.sprite_path)
+            assert os.path.exists(builder.clip_path)
+            assert builder.to_dict()['sprite']['frames'] == [0, 5]
+
+    def test_failed_processing_leaves_no_previews(self, create_test_video):
+        """Test previews are only written for videos that finished"""
+        processor = VideoProcessor(RecordingDetector(fail_after=5))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            create_test_video(input_path, num_frames=10, fps=5)
+            
+            builder = PreviewBuilder(
+                os.path.join(tmpdir, "sprite.jpg"),
+                os.path.join(tmpdir, "preview.mp4")
+            )
+            success, _ = processor.process_video(
+                input_path, os.path.join(tmpdir, "test_output.mp4"), preview_builder=builder
+            )
+            
+            assert success is False
+            assert not os.path.exists(builder.sprite_path)
+            assert not os.path.exists(builder.clip_path)
+    
+    def test_cancelled_processing_stops(self, processor, create_test_video):
+        """Test a set cancel flag stops processing without finishing output"""
+        import threading
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "test_input.mp4")
+            create_test_video(input_path, num_frames=10)
+            builder = PreviewBuilder(
+                os.path.join(tmpdir, "sprite.jpg"),
+                os.path.join(tmpdir, "preview.mp4")
+            )
+            cancel = threading.Event()
+            cancel.set()
+            
+            success, message = processor.process_video(
+                input_path, os.path.join(tmpdir, "test_output.mp4"), preview_builder=builder, cancel=cancel
+            )
+            
+            assert success is False
+            assert "cancelled" in message.lower()
+            assert not os.path.exists(builder.sprite_path)
+    
+    def test_resolve_frame_range(self):
+        """Test seconds/frames conversion and clamping"""
+        assert VideoProcessor.resolve_frame_range(None, None, 'seconds', 30, 300) == (0, 300)
+        assert VideoProcessor.resolve_frame_range(1.5, 2.0, 'seconds', 30, 300) == (45, 60)
+        assert VideoProcessor.resolve_frame_range(10, 1000, 'frames', 30, 300) == (10, 300)
+        assert VideoProcessor.resolve_frame_range(10, None, 'frames', 30, 0) == (10, None)
+        with pytest.raises(ValueError):
+            VideoProcessor.resolve_frame_range(-1, None, 'frames', 30, 300)
+
     def test_cleanup(self, processor):
         """Test cleanup doesn't raise errors"""
         try: